@@ -1,17 +1,21 @@
 #!/usr/bin/env python3
-import sqlite3
+import sqlite_profiles
 
 
 class DatabaseConnection:
-    """Custom class-based context manager for handling DB connections."""
+    """
+    Custom class-based context manager for handling DB connections.
+    profile names a sqlite_profiles setting, e.g. "read-heavy".
+    """
 
-    def __init__(self, db_name):
+    def __init__(self, db_name, profile="default"):
         self.db_name = db_name
+        self.profile = profile
         self.conn = None
 
     def __enter__(self):
         """Open database connection."""
-        self.conn = sqlite3.connect(self.db_name)
+        self.conn = sqlite_profiles.connect(self.db_name, self.profile)
         return self.conn
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -1,20 +1,24 @@
 #!/usr/bin/env python3
-import sqlite3
+import sqlite_profiles
 
 
 class ExecuteQuery:
-    """Reusable context manager for executing SQL queries with parameters."""
+    """
+    Reusable context manager for executing SQL queries with parameters.
+    profile names a sqlite_profiles setting, e.g. "read-heavy".
+    """
 
-    def __init__(self, db_name, query, params=None):
+    def __init__(self, db_name, query, params=None, profile="default"):
         self.db_name = db_name
         self.query = query
         self.params = params or ()
+        self.profile = profile
         self.conn = None
         self.cursor = None
 
     def __enter__(self):
         """Establish connection and execute query."""
-        self.conn = sqlite3.connect(self.db_name)
+        self.conn = sqlite_profiles.connect(self.db_name, self.profile)
         self.cursor = self.conn.cursor()
         self.cursor.execute(self.query, self.params)
         return self.cursor.fetchall()
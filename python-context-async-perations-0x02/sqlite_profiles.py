@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Named SQLite connection profiles.
+
+Trimmed copy of python-decorators-0x01/sqlite_profiles.py (the source)
+with the profiles these context managers use; change that one first.
+
+SQLite's defaults (rollback journal, synchronous=FULL, no mmap, 2 MiB page
+cache) make readers and writers block each other and fsync every commit.
+- "default":    SQLite's own settings, what a bare sqlite3.connect() gives
+- "read-heavy": WAL so readers never wait on the writer, synchronous=NORMAL
+  so the occasional write does not fsync, a 256 MiB memory map and 64 MiB
+  page cache for hot lookups
+
+WAL keeps commits atomic and the file consistent; with synchronous=NORMAL
+the last commits before a power loss (not a process crash) can be lost.
+journal_mode=WAL is stored in the database file and stays on for every
+later connection.
+"""
+import sqlite3
+
+PROFILES = {
+    "default": {},
+    "read-heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # negative: KiB rather than pages
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+
+
+def profile_pragmas(profile):
+    """PRAGMA settings of a profile name (or of a dict, returned as is)."""
+    if isinstance(profile, dict):
+        return profile
+    try:
+        return PROFILES[profile or "default"]
+    except KeyError:
+        raise ValueError(
+            f"Unknown SQLite profile {profile!r}; expected one of {', '.join(PROFILES)}"
+        ) from None
+
+
+def apply_profile(conn, profile):
+    """Run a profile's PRAGMAs on an open connection."""
+    for name, value in profile_pragmas(profile).items():
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+def connect(path, profile="default", **kwargs):
+    """sqlite3.connect(path, **kwargs) with the profile applied."""
+    return apply_profile(sqlite3.connect(path, **kwargs), profile)
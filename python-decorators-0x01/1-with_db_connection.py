@@ -1,18 +1,5 @@
 #!/usr/bin/env python3
-import sqlite3
-import functools
-
-def with_db_connection(func):
-    """Decorator to handle opening and closing of the database connection."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            result = func(conn, *args, **kwargs)
-        finally:
-            conn.close()
-        return result
-    return wrapper
+from db_pool import with_db_connection
 
 
 @with_db_connection
@@ -1,32 +1,48 @@
 #!/usr/bin/env python3
-import sqlite3
 import functools
 
-def with_db_connection(func):
-    """Handles DB connection."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            result = func(conn, *args, **kwargs)
-        finally:
-            conn.close()
-        return result
-    return wrapper
+from db_pool import with_db_connection
+from result_cache import invalidate_tables, written_table
+
+
+# id(conn) -> tables written through it by the outermost transactional call;
+# sqlite3 has no getter for the trace callback, so nested calls on the same
+# (reentrant pooled) connection share this set instead of replacing it
+_written = {}
 
 
 def transactional(func):
-    """Decorator to handle DB transactions (commit/rollback)."""
+    """
+    Decorator to handle DB transactions (commit/rollback).
+    After a commit, cached query results that read a written table are evicted.
+    """
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
+        outermost = id(conn) not in _written
+        if outermost:
+            written = _written[id(conn)] = set()
+
+            def trace(statement):
+                table = written_table(statement)
+                if table:
+                    written.add(table)
+
+            conn.set_trace_callback(trace)
+        else:
+            written = _written[id(conn)]
         try:
             result = func(conn, *args, **kwargs)
             conn.commit()
-            return result
         except Exception as e:
             conn.rollback()
             print(f"[ERROR] Transaction rolled back due to: {e}")
             raise
+        finally:
+            if outermost:
+                conn.set_trace_callback(None)
+                del _written[id(conn)]
+        invalidate_tables(written)
+        return result
     return wrapper
 
 
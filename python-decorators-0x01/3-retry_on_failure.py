@@ -3,17 +3,7 @@ import time
 import sqlite3
 import functools
 
-def with_db_connection(func):
-    """Open and close DB connection automatically."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            result = func(conn, *args, **kwargs)
-        finally:
-            conn.close()
-        return result
-    return wrapper
+from db_pool import with_db_connection
 
 
 def retry_on_failure(retries=3, delay=2):
@@ -1,34 +1,74 @@
 #!/usr/bin/env python3
-import sqlite3
+import inspect
 import functools
 
-query_cache = {}
+from db_pool import current_pool, with_db_connection
+from result_cache import MISS, make_key, query_cache, query_flights, read_tables
 
-def with_db_connection(func):
-    """Handle DB connections automatically."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            result = func(conn, *args, **kwargs)
-        finally:
-            conn.close()
-        return result
-    return wrapper
 
+def cache_query(func=None, *, ttl=None, single_flight=False, stale=0, cache=None,
+                pool=None, profile=None):
+    """
+    Decorator to cache query results in query_cache.
+    Use bare (@cache_query) or with options (@cache_query(ttl=30)).
+    The key is the normalized `query` plus `params`, positional or keyword;
+    calls without a `query` string are not cached.
+
+    single_flight=True: concurrent misses on one key run the query once and
+    share its result. stale=<seconds>: past its ttl an entry is still served
+    for that long while a single background refresh, on its own pooled
+    connection, re-runs the query (implies single_flight). That connection
+    comes from pool=/profile= when given, else from the pool of the caller's
+    own @with_db_connection.
+    cache=<store> uses another QueryCache/SQLiteResultStore than query_cache.
+    """
+    if func is None:
+        return functools.partial(cache_query, ttl=ttl, single_flight=single_flight,
+                                 stale=stale, cache=cache, pool=pool, profile=profile)
+    store = query_cache if cache is None else cache
+    signature = inspect.signature(func)
 
-def cache_query(func):
-    """Decorator to cache query results."""
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
-        query = kwargs.get("query")
-        if query in query_cache:
+        bound = signature.bind(conn, *args, **kwargs).arguments
+        query = bound.get("query")
+        if not isinstance(query, str):
+            # nothing to key on or to invalidate by; always run the function
+            return func(conn, *args, **kwargs)
+        key = make_key(query, bound.get("params"))
+
+        def load(conn, generations):
+            result = func(conn, *args, **kwargs)
+            store.store(key, result, ttl, tables, stale, generations)
+            return result
+
+        if stale:
+            result, fresh = store.lookup_stale(key)
+            if result is not MISS and not fresh:
+                tables = read_tables(query)
+                generations = store.generations(tables)
+                # the caller's connection goes back to the pool when it
+                # returns, so the refresh borrows its own from the same pool
+                refresh = with_db_connection(
+                    lambda conn: load(conn, generations),
+                    pool=pool or (None if profile else current_pool()), profile=profile,
+                )
+                query_flights.do_async((key, generations), refresh)
+        else:
+            result = store.lookup(key)
+        if result is not MISS:
             print("[CACHE HIT] Returning cached results.")
-            return query_cache[query]
+            return result
         print("[CACHE MISS] Executing query and caching result.")
-        result = func(conn, *args, **kwargs)
-        query_cache[query] = result
-        return result
+        # taken before the query runs: a commit to one of these tables while
+        # it runs makes store() drop the result instead of caching old rows
+        tables = read_tables(query)
+        generations = store.generations(tables)
+        if single_flight or stale:
+            # callers that arrive after an invalidation start their own flight
+            # rather than sharing one that may have read the old rows
+            return query_flights.do((key, generations), lambda: load(conn, generations))
+        return load(conn, generations)
     return wrapper
 
 
@@ -44,3 +84,4 @@ if __name__ == "__main__":
     q = "SELECT * FROM users"
     print(fetch_users_with_cache(query=q))   # Executes and caches
     print(fetch_users_with_cache(query=q))   # Uses cache
+    print(query_cache.stats())
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Python Decorators project.
+
+Each run builds its own temporary users database, so no users.db is needed:
+  ./benchmarks.py connection [calls] [threads]
+  ./benchmarks.py mixed [seconds] [readers] [rows]
+  ./benchmarks.py logging [calls]
+  ./benchmarks.py metrics [calls]
+
+Each benchmark prints one line per variant so runs can be diffed.
+"""
+import contextlib
+import functools
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import query_log
+from query_metrics import QueryMetrics, instrument_queries
+from db_pool import ConnectionPool, with_db_connection
+from sqlite_profiles import PROFILES
+
+transactional = __import__("2-transactional").transactional
+
+
+def _seed_users(path, rows):
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS users "
+            "(id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)"
+        )
+        conn.executemany(
+            "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+            ((f"user{i}", f"user{i}@example.com", 18 + i % 60) for i in range(rows)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _connect_per_call(path):
+    """The old with_db_connection: open and close the file on every call"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            conn = sqlite3.connect(path)
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                conn.close()
+        return wrapper
+    return decorator
+
+
+def _get_user_by_id(conn, user_id):
+    return conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+
+
+def _latencies(call, calls, threads):
+    """Per-call latencies (seconds) of call(user_id) spread over `threads`"""
+    results = []
+
+    def run(offset):
+        mine = []
+        for i in range(calls // threads):
+            start = time.perf_counter()
+            call(1 + (offset + i) % 1000)
+            mine.append(time.perf_counter() - start)
+        results.extend(mine)
+
+    workers = [threading.Thread(target=run, args=(t * 7919,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sorted(results)
+
+
+def _report(label, latencies):
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1e6
+    mean = sum(latencies) / len(latencies) * 1e6
+    print(
+        f"{label:<14} calls={len(latencies)} mean={mean:.1f}us "
+        f"p50={pct(50):.1f}us p95={pct(95):.1f}us p99={pct(99):.1f}us"
+    )
+
+
+def bench_connection(calls=20000, threads=1):
+    """get_user_by_id per-call latency: connect/close per call vs the pool"""
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "users.db")
+        _seed_users(path, 1000)
+        pool = ConnectionPool(path, max_size=max(threads, 1))
+        variants = (
+            ("connect/close", _connect_per_call(path)(_get_user_by_id)),
+            ("pooled", with_db_connection(pool=pool)(_get_user_by_id)),
+        )
+        for label, call in variants:
+            _report(label, _latencies(call, calls, threads))
+        print(f"{'pool':<14} {pool.stats()}")
+        pool.close()
+
+
+def _update_user_email(conn, user_id, new_email):
+    conn.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+
+def _mixed_run(profile, seconds, readers, rows):
+    """reader threads doing lookups while one writer commits updates"""
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "users.db")
+        _seed_users(path, rows)
+        pool = ConnectionPool(path, max_size=readers + 1, profile=profile)
+        get_user = with_db_connection(pool=pool)(_get_user_by_id)
+        update = with_db_connection(pool=pool)(transactional(_update_user_email))
+        stop = threading.Event()
+        read_latencies, write_latencies, errors = [], [], []
+
+        def read(offset):
+            mine, i = [], offset
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    get_user(1 + i % rows)
+                except sqlite3.OperationalError as err:  # database is locked
+                    errors.append(err)
+                mine.append(time.perf_counter() - start)
+                i += 1
+            read_latencies.extend(mine)
+
+        def write():
+            i = 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    update(1 + i % rows, f"user{i}@example.org")
+                except sqlite3.OperationalError as err:
+                    errors.append(err)
+                write_latencies.append(time.perf_counter() - start)
+                i += 1
+
+        threads = [threading.Thread(target=read, args=(t * 7919,)) for t in range(readers)]
+        threads.append(threading.Thread(target=write))
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        pool.close()
+    return sorted(read_latencies), sorted(write_latencies), len(errors)
+
+
+def bench_mixed(seconds=3, readers=4, rows=10000):
+    """Each profile under concurrent reads plus a committing writer on users.db"""
+    for profile in PROFILES:
+        reads, writes, errors = _mixed_run(profile, seconds, readers, rows)
+        p99_read = reads[int(len(reads) * 0.99)] * 1e6 if reads else 0.0
+        p99_write = writes[int(len(writes) * 0.99)] * 1e6 if writes else 0.0
+        print(
+            f"{profile:<12} reads/s={len(reads) / seconds:,.0f} "
+            f"writes/s={len(writes) / seconds:,.0f} read_p99={p99_read:.0f}us "
+            f"write_p99={p99_write:.0f}us errors={errors}"
+        )
+
+
+def _print_logged(func):
+    """The old log_queries: strftime and a synchronous print per call"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        query = kwargs.get('query') or (args[0] if args else None)
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] Executing SQL query: {query}")
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def _noop_query(query):
+    return []
+
+
+def bench_logging(calls=100000):
+    """
+    Calling-thread CPU per log_queries call (output goes to /dev/null); the
+    background writer's own CPU is excluded by timing with thread_time().
+    """
+    with open(os.devnull, "w") as devnull:
+        query_log.configure_query_log(logging.StreamHandler(devnull))
+        variants = (
+            ("undecorated", _noop_query),
+            ("print", _print_logged(_noop_query)),
+            ("queue/all", query_log.log_queries(sample_rate=1.0)(_noop_query)),
+            ("queue/10%", query_log.log_queries(sample_rate=0.1)(_noop_query)),
+            ("queue/0%", query_log.log_queries(sample_rate=0.0)(_noop_query)),
+        )
+        with contextlib.redirect_stdout(devnull):
+            results = []
+            for label, call in variants:
+                start = time.thread_time()
+                for _ in range(calls):
+                    call(query="SELECT * FROM users")
+                results.append((label, (time.thread_time() - start) / calls))
+            query_log.flush_query_log()
+    base = results[0][1]
+    for label, per_call in results:
+        print(f"{label:<12} per_call={per_call * 1e6:.2f}us overhead={(per_call - base) * 1e6:.2f}us")
+
+
+def bench_metrics(calls=20000):
+    """instrument_queries overhead per call, then its JSON snapshot"""
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "users.db")
+        _seed_users(path, 1000)
+        pool = ConnectionPool(path)
+        metrics = QueryMetrics()
+
+        def get_user(conn, query, params):
+            return conn.execute(query, params).fetchone()
+
+        variants = (
+            ("plain", with_db_connection(pool=pool)(get_user)),
+            ("instrumented", with_db_connection(pool=pool)(
+                instrument_queries(metrics=metrics)(get_user))),
+        )
+        results = []
+        for label, call in variants:
+            start = time.perf_counter()
+            for i in range(calls):
+                call("SELECT * FROM users WHERE id = ?", (1 + i % 1000,))
+            results.append((label, (time.perf_counter() - start) / calls))
+        pool.close()
+    base = results[0][1]
+    for label, per_call in results:
+        print(f"{label:<14} per_call={per_call * 1e6:.2f}us overhead={(per_call - base) * 1e6:.2f}us")
+    print(metrics.to_json())
+
+
+BENCHMARKS = {
+    "connection": bench_connection,
+    "mixed": bench_mixed,
+    "logging": bench_logging,
+    "metrics": bench_metrics,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(f"usage: {sys.argv[0]} {{{','.join(BENCHMARKS)}}} [args...]")
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](*(int(a) for a in sys.argv[2:]))
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Shared, pooled with_db_connection for the decorator tasks.
+
+Opening users.db on every call re-reads the schema and starts from a cold
+page cache; ConnectionPool keeps connections open and hands them out again.
+- at most max_size connections are checked out; acquire() waits up to
+  `timeout` seconds, then raises TimeoutError
+- a thread that is already holding a connection (a decorated function
+  calling another one) gets that same connection back, not a second one
+- connections idle for longer than validate_after seconds are checked with
+  SELECT 1 before reuse and replaced if broken
+- released connections are rolled back, so nothing uncommitted leaks into
+  the next caller (the same as closing them did)
+
+Connections are opened with a named profile (sqlite_profiles.py); there
+is one shared pool per profile, and @with_db_connection(profile="read-heavy")
+picks one.
+
+Env vars: USERS_DB (default users.db), DB_POOL_SIZE, DB_POOL_TIMEOUT,
+DB_PROFILE (the profile of the bare @with_db_connection, default "default").
+"""
+import contextlib
+import functools
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+import sqlite_profiles
+
+DEFAULT_PATH = "users.db"
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of sqlite3 connections to one database file."""
+
+    def __init__(self, path=DEFAULT_PATH, max_size=8, timeout=10.0, validate_after=30.0,
+                 profile="default"):
+        self.path = path
+        self.profile = profile
+        sqlite_profiles.profile_pragmas(profile)  # reject unknown names up front
+        self.max_size = max_size
+        self.timeout = timeout
+        self.validate_after = validate_after
+        self._idle = deque()  # (connection, released_at), most recent on the right
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._held = threading.local()  # this thread's (connection, depth)
+        self._counters = {
+            "hits": 0, "misses": 0, "reentrant": 0, "failed_checks": 0,
+            "discarded": 0, "timeouts": 0,
+        }
+
+    def _count(self, key):
+        with self._lock:
+            self._counters[key] += 1
+
+    def _connect(self):
+        # handed between threads, but only ever used by one at a time
+        return sqlite_profiles.connect(self.path, self.profile, check_same_thread=False)
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _take_idle(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, released_at = self._idle.pop()
+            if time.monotonic() - released_at <= self.validate_after:
+                return conn
+            try:
+                conn.execute("SELECT 1")
+                return conn
+            except sqlite3.Error:
+                self._count("failed_checks")
+                self._close(conn)
+
+    def acquire(self):
+        """Check out a connection (this thread's current one, if it has one)."""
+        held = getattr(self._held, "entry", None)
+        if held is not None:
+            self._held.entry = (held[0], held[1] + 1)
+            self._count("reentrant")
+            return held[0]
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count("timeouts")
+            raise TimeoutError(f"No pooled connection to {self.path} within {self.timeout}s")
+        try:
+            conn = self._take_idle()
+            if conn is None:
+                self._count("misses")
+                conn = self._connect()
+            else:
+                self._count("hits")
+        except BaseException:
+            self._slots.release()
+            raise
+        self._held.entry = (conn, 1)
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection; discard=True closes it instead of reusing it."""
+        held = getattr(self._held, "entry", None)
+        if held is not None and held[0] is conn and held[1] > 1:
+            self._held.entry = (conn, held[1] - 1)
+            return
+        self._held.entry = None
+        try:
+            if not discard:
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    discard = True
+            if discard:
+                self._count("discarded")
+                self._close(conn)
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    @contextlib.contextmanager
+    def connection(self):
+        """with pool.connection() as conn: ... (broken connections are dropped)"""
+        conn = self.acquire()
+        try:
+            yield conn
+        except (sqlite3.InterfaceError, sqlite3.ProgrammingError):
+            self.release(conn, discard=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, idle=len(self._idle), max_size=self.max_size)
+
+    def close(self):
+        """Close idle connections; checked-out ones close when released."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._close(conn)
+
+
+_pools = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+_current = threading.local()  # the pool of this thread's innermost wrapped call
+
+
+def get_pool(profile=None):
+    """Process-wide pool for USERS_DB with `profile` (default DB_PROFILE)."""
+    global _pools_pid
+    profile = profile or os.environ.get("DB_PROFILE", "default")
+    with _pools_lock:
+        # a forked child must not share the parent's open database handles
+        if _pools_pid != os.getpid():
+            _pools_pid = os.getpid()
+            _pools.clear()
+        if profile not in _pools:
+            _pools[profile] = ConnectionPool(
+                os.environ.get("USERS_DB", DEFAULT_PATH),
+                max_size=int(os.environ.get("DB_POOL_SIZE", "8")),
+                timeout=float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+                profile=profile,
+            )
+        return _pools[profile]
+
+
+def current_pool():
+    """Pool the innermost running @with_db_connection call on this thread uses."""
+    return getattr(_current, "pool", None)
+
+
+def with_db_connection(func=None, *, pool=None, profile=None):
+    """
+    Decorator that passes a pooled connection as the first argument.
+    Use bare (@with_db_connection), with a profile
+    (@with_db_connection(profile="bulk-write")) or with a pool (pool=p).
+    """
+    if func is None:
+        return functools.partial(with_db_connection, pool=pool, profile=profile)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        source = pool or get_pool(profile)
+        outer, _current.pool = current_pool(), source
+        try:
+            with source.connection() as conn:
+                return func(conn, *args, **kwargs)
+        finally:
+            _current.pool = outer
+    return wrapper
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Non-blocking, structured query logging for log_queries.
+
+The calling thread only times the query and puts a small tuple on a queue;
+a QueueListener thread turns it into a LogRecord, formats it as one JSON
+line and writes it, so neither record building nor a slow stdout holds up
+a query.
+- failed queries and every query slower than slow_ms are logged (level
+  WARNING, with "error" / "slow": true)
+- other queries are logged with probability sample_rate (level INFO)
+
+Env vars: QUERY_LOG_SAMPLE (default 1.0), QUERY_LOG_SLOW_MS (default 100).
+"""
+import atexit
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+LOGGER_NAME = "queries"
+
+_records = queue.SimpleQueue()
+_listener = None
+_listener_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level and the query fields."""
+
+    FIELDS = ("func", "query", "duration_ms", "rows", "slow", "error")
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "event": record.getMessage(),
+        }
+        for field in self.FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        return json.dumps(entry)
+
+
+class _QueryListener(logging.handlers.QueueListener):
+    """QueueListener fed (created, level, fields) tuples by log_queries."""
+
+    def prepare(self, item):
+        created, level, fields = item
+        record = logging.makeLogRecord(fields)
+        record.name = LOGGER_NAME
+        record.msg = "query"
+        record.levelno, record.levelname = level, logging.getLevelName(level)
+        record.created = created
+        record.msecs = (created % 1) * 1000.0
+        return record
+
+
+def _start(handler):
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    if handler is None:
+        handler = logging.StreamHandler(sys.stdout)
+    if handler.formatter is None:
+        handler.setFormatter(JsonFormatter())
+    _listener = _QueryListener(_records, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def configure_query_log(handler=None):
+    """
+    (Re)start the background writer; handler defaults to JSON lines on
+    stdout. Called automatically on the first logged query.
+    """
+    with _listener_lock:
+        _start(handler)
+
+
+def flush_query_log():
+    """Write out everything still queued and stop the background writer."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(flush_query_log)
+
+
+def _emit(level, fields):
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                _start(None)
+    _records.put((time.time(), level, fields))
+
+
+def log_queries(func=None, *, sample_rate=None, slow_ms=None):
+    """
+    Decorator that times each call and logs the SQL query in the background.
+    Use bare (@log_queries) or tuned (@log_queries(sample_rate=0.1, slow_ms=50)).
+    """
+    if func is None:
+        return functools.partial(log_queries, sample_rate=sample_rate, slow_ms=slow_ms)
+    if sample_rate is None:
+        sample_rate = float(os.environ.get("QUERY_LOG_SAMPLE", "1.0"))
+    if slow_ms is None:
+        slow_ms = float(os.environ.get("QUERY_LOG_SLOW_MS", "100"))
+    slow_after = slow_ms / 1000.0
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        error = None
+        result = None
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception as err:
+            error = repr(err)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            slow = elapsed >= slow_after
+            if slow or error or random.random() < sample_rate:
+                query = kwargs.get("query")
+                if query is None and args and isinstance(args[0], str):
+                    query = args[0]
+                _emit(logging.WARNING if slow or error else logging.INFO, {
+                    "func": func.__name__,
+                    "query": query,
+                    "duration_ms": round(elapsed * 1000.0, 3),
+                    "rows": len(result) if isinstance(result, list) else None,
+                    "slow": slow,
+                    "error": error,
+                })
+    return wrapper
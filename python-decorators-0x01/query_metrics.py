@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Per-query latency histograms for queries run through the decorators.
+
+@instrument_queries goes under @with_db_connection and records, per
+query shape (normalized SQL with its literals replaced by ?, see
+query_shape): calls, errors, rows and a latency histogram. The first time
+a query takes longer than slow_ms, its EXPLAIN QUERY PLAN is captured on
+the same connection and kept with it. Past max_queries distinct shapes,
+new ones are counted together under OTHER, so the series stay bounded.
+
+query_metrics.snapshot() gives p50/p95/p99 per query; to_json() and
+to_prometheus() export the same data for dashboards.
+- percentiles come from log-spaced buckets 5% apart (values within ~2.5%)
+- Prometheus buckets are exact counts against PROMETHEUS_BUCKETS
+
+Env var: QUERY_METRICS_SLOW_MS (default 100).
+"""
+import bisect
+import functools
+import inspect
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from result_cache import normalize_sql
+
+PROMETHEUS_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+DEFAULT_PERCENTILES = (50, 95, 99)
+_GAMMA = 1.05
+_LOG_GAMMA = math.log(_GAMMA)
+_MIN_SECONDS = 1e-7
+OTHER = "<other>"
+
+# "quoted" identifiers (kept), string/blob literals and numbers outside names
+_LITERALS = re.compile(
+    r"(\"(?:[^\"]|\"\")*\")|(?:\bx)?'(?:[^']|'')*'|(?<![\w.])\d+(?:\.\d*)?(?:e[+-]?\d+)?\b"
+)
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+@functools.lru_cache(maxsize=4096)  # the same few strings come through again and again
+def query_shape(sql):
+    """normalize_sql(sql) with literals as ? and IN lists folded to (?)"""
+    shape = _LITERALS.sub(lambda m: m.group(1) or "?", normalize_sql(sql))
+    return _IN_LIST.sub("(?)", shape)
+
+
+class LatencyHistogram:
+    """Log-bucketed latency counts plus exact counts per Prometheus bound."""
+
+    __slots__ = ("count", "sum", "max", "_fine", "_buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._fine = {}  # bucket index -> count
+        self._buckets = [0] * (len(PROMETHEUS_BUCKETS) + 1)  # last one is +Inf
+
+    def add(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        index = math.ceil(math.log(max(seconds, _MIN_SECONDS)) / _LOG_GAMMA)
+        self._fine[index] = self._fine.get(index, 0) + 1
+        self._buckets[bisect.bisect_left(PROMETHEUS_BUCKETS, seconds)] += 1
+
+    def percentile(self, pct):
+        """Latency (seconds) at percentile pct, 0 < pct <= 100"""
+        if not self.count:
+            return 0.0
+        rank = pct / 100.0 * (self.count - 1)
+        seen = 0
+        for index in sorted(self._fine):
+            seen += self._fine[index]
+            if seen > rank:
+                # midpoint of the bucket (gamma^(i-1), gamma^i]
+                return min(2 * _GAMMA ** index / (_GAMMA + 1), self.max)
+        return self.max
+
+    def cumulative_buckets(self):
+        """[(le, count)] with +Inf last, as Prometheus histograms report them"""
+        total, out = 0, []
+        for bound, count in zip(PROMETHEUS_BUCKETS + (math.inf,), self._buckets):
+            total += count
+            out.append((bound, total))
+        return out
+
+
+class QueryStats:
+    __slots__ = ("query", "calls", "errors", "rows", "latency", "plan", "plan_requested")
+
+    def __init__(self, query):
+        self.query = query
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.latency = LatencyHistogram()
+        self.plan = None  # EXPLAIN QUERY PLAN lines, once captured
+        self.plan_requested = False
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class QueryMetrics:
+    """Thread-safe registry of QueryStats keyed by query shape."""
+
+    def __init__(self, max_queries=1000):
+        self.max_queries = max_queries
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, query, seconds, rows=0, error=False):
+        """Add one execution to the stats of query; returns those stats."""
+        with self._lock:
+            stats = self._stats.get(query)
+            if stats is None:
+                if len(self._stats) >= self.max_queries:
+                    query = OTHER
+                    stats = self._stats.get(query)
+                if stats is None:
+                    stats = self._stats[query] = QueryStats(query)
+            stats.calls += 1
+            stats.rows += rows
+            stats.errors += error
+            stats.latency.add(seconds)
+            return stats
+
+    def claim_plan(self, stats):
+        """Only the first caller over the threshold captures the plan."""
+        with self._lock:
+            if stats.plan_requested:
+                return False
+            stats.plan_requested = True
+            return True
+
+    def set_plan(self, stats, plan):
+        with self._lock:
+            stats.plan = plan
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self, percentiles=DEFAULT_PERCENTILES):
+        """{query: {calls, errors, rows, mean_ms, max_ms, pNN_ms, plan}}"""
+        with self._lock:
+            out = {}
+            for query, stats in self._stats.items():
+                latency = stats.latency
+                entry = {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "rows": stats.rows,
+                    "mean_ms": latency.sum / latency.count * 1000.0 if latency.count else 0.0,
+                    "max_ms": latency.max * 1000.0,
+                }
+                for pct in percentiles:
+                    entry[f"p{pct}_ms"] = latency.percentile(pct) * 1000.0
+                entry["plan"] = stats.plan
+                out[query] = entry
+            return out
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self, prefix="sql_query"):
+        """Prometheus text exposition: duration histogram, rows and errors"""
+        with self._lock:
+            items = [
+                (_escape_label(query), stats.latency.cumulative_buckets(),
+                 stats.latency.sum, stats.calls, stats.rows, stats.errors)
+                for query, stats in self._stats.items()
+            ]
+        lines = [
+            f"# HELP {prefix}_duration_seconds Query latency by query shape.",
+            f"# TYPE {prefix}_duration_seconds histogram",
+        ]
+        for label, buckets, total, calls, _, _ in items:
+            for bound, count in buckets:
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(f'{prefix}_duration_seconds_bucket{{query="{label}",le="{le}"}} {count}')
+            lines.append(f'{prefix}_duration_seconds_sum{{query="{label}"}} {total}')
+            lines.append(f'{prefix}_duration_seconds_count{{query="{label}"}} {calls}')
+        for name, help_text, pos in (("rows", "Rows returned or changed.", 4),
+                                     ("errors", "Failed executions.", 5)):
+            lines.append(f"# HELP {prefix}_{name}_total {help_text}")
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            for item in items:
+                lines.append(f'{prefix}_{name}_total{{query="{item[0]}"}} {item[pos]}')
+        return "\n".join(lines) + "\n"
+
+
+query_metrics = QueryMetrics()
+
+
+def _explain(conn, query, params):
+    try:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params or ()).fetchall()
+    except sqlite3.Error as err:
+        return [f"EXPLAIN failed: {err}"]
+    return [row[-1] for row in rows]
+
+
+def instrument_queries(func=None, *, slow_ms=None, metrics=None):
+    """
+    Decorator recording latency, rows and calls per query shape.
+    Place it under @with_db_connection: it needs the connection (first
+    argument) to run EXPLAIN QUERY PLAN when a call exceeds slow_ms.
+    """
+    if func is None:
+        return functools.partial(instrument_queries, slow_ms=slow_ms, metrics=metrics)
+    if slow_ms is None:
+        slow_ms = float(os.environ.get("QUERY_METRICS_SLOW_MS", "100"))
+    slow_after = slow_ms / 1000.0
+    registry = query_metrics if metrics is None else metrics
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(conn, *args, **kwargs):
+        if "query" in kwargs:
+            query, params = kwargs["query"], kwargs.get("params")
+        else:
+            bound = signature.bind(conn, *args, **kwargs).arguments
+            query, params = bound.get("query"), bound.get("params")
+        changes = conn.total_changes
+        failed = True
+        start = time.perf_counter()
+        try:
+            result = func(conn, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            if isinstance(query, str):
+                if failed:
+                    rows = 0
+                elif isinstance(result, list):
+                    rows = len(result)
+                elif result is not None:
+                    rows = 1
+                else:
+                    rows = conn.total_changes - changes
+                stats = registry.record(query_shape(query), elapsed, rows, failed)
+                if elapsed >= slow_after and not failed and registry.claim_plan(stats):
+                    registry.set_plan(stats, _explain(conn, query, params))
+    return wrapper
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Bounded in-memory store for cached query results.
+
+QueryCache evicts least recently used entries once either limit is passed
+(max_entries, or max_bytes of estimated result size) and drops entries
+older than their TTL on lookup. Counters are available from stats().
+
+Keys are built from the normalized SQL plus its bound parameters
+(make_key), and every entry remembers the tables its query reads.
+invalidate_tables() evicts just the entries that read a written table;
+transactional (2-transactional.py) calls it after each commit. It also
+moves each table's generation: a query takes generations() before it
+runs and passes them to store(), which drops the result if one moved in
+the meantime, so a read that raced a commit never caches the old rows.
+
+SingleFlight collapses concurrent misses for one key into a single query
+whose result every waiting caller shares; entries stored with `stale`
+seconds of grace can be served past their TTL while one background
+refresh runs (lookup_stale).
+
+sqlite_cache.SQLiteResultStore is a drop-in, cross-process alternative to
+QueryCache; QUERY_CACHE_BACKEND selects which one query_cache is.
+"""
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+MISS = object()  # lookup() result for "not cached"; None is a valid result
+
+# quoted literals are kept verbatim; everything else is case/space folded
+_SQL_TOKENS = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|(\s+)|([^'\"\s]+)")
+# a bare, "quoted", `quoted` or [bracketed] name
+_NAME = r"(?:\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]|\w+)"
+_NAMES = re.compile(_NAME)
+# dotted identifiers, string literals, parentheses, commas, any other character
+_READ_TOKENS = re.compile(rf"'(?:[^']|'')*'|({_NAME}(?:\.{_NAME})*)|([(),])|\S")
+# keywords that end a FROM list
+_FROM_ENDS = frozenset((
+    "where", "group", "order", "limit", "having", "window", "union",
+    "intersect", "except", "on", "using", "returning",
+))
+# the target of a write statement, after any leading WITH clause
+_WRITE_TARGET = re.compile(
+    r"\s*(?:insert(?:\s+or\s+\w+)?\s+into|replace\s+into|update(?:\s+or\s+\w+)?"
+    r"|delete\s+from|alter\s+table|drop\s+table(?:\s+if\s+exists)?)\s+"
+    rf"({_NAME}(?:\.{_NAME})*)",
+    re.IGNORECASE,
+)
+
+_caches = weakref.WeakSet()
+
+
+def normalize_sql(sql):
+    """Fold case and whitespace outside string literals; drop a trailing ';'."""
+    parts = []
+    for literal, space, word in _SQL_TOKENS.findall(sql.strip().rstrip(";")):
+        if literal:
+            parts.append(literal)
+        elif space:
+            parts.append(" ")
+        else:
+            parts.append(word.lower())
+    return "".join(parts).strip()
+
+
+def _freeze(params):
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return tuple(sorted(params.items()))
+    return tuple(params)
+
+
+def make_key(query, params=None):
+    """Cache key: normalized SQL plus the bound parameters."""
+    return (normalize_sql(query) if isinstance(query, str) else query, _freeze(params))
+
+
+def _table_name(identifier):
+    # main."Users" -> users
+    last = _NAMES.findall(identifier)[-1]
+    return last.strip('"`[]').replace('""', '"').lower()
+
+
+def read_tables(sql):
+    """
+    Lower-cased names of the tables a query reads: every entry of each FROM
+    list (comma joins included) and every JOINed table, in subqueries too.
+    """
+    tables = set()
+    in_from = expect_table = False
+    outer = []  # (in_from, expect_table) of the enclosing parentheses
+    for identifier, punct in _READ_TOKENS.findall(sql):
+        if punct == "(":
+            outer.append((in_from, expect_table))
+            in_from = expect_table = False
+        elif punct == ")":
+            # a FROM subquery may be followed by an alias and ", next_table"
+            in_from, _ = outer.pop() if outer else (False, False)
+            expect_table = False
+        elif punct == ",":
+            expect_table = in_from
+        elif identifier:
+            word = identifier.lower()
+            if word in ("from", "join"):
+                in_from = expect_table = True
+            elif word in _FROM_ENDS:
+                in_from = expect_table = False
+            elif expect_table:
+                tables.add(_table_name(identifier))
+                expect_table = False
+        else:
+            expect_table = False
+    return frozenset(tables)
+
+
+def _after_with(sql):
+    """Offset of the statement behind a leading WITH ... (...) clause, else 0."""
+    tokens = _READ_TOKENS.finditer(sql)
+    first = next(tokens, None)
+    if first is None or (first.group(1) or "").lower() != "with":
+        return 0
+    depth, closed = 0, False
+    for token in tokens:
+        identifier, punct = token.group(1), token.group(2)
+        if punct == "(":
+            depth += 1
+        elif punct == ")":
+            depth -= 1
+            closed = depth == 0
+        elif closed:
+            # "name(cols) AS (...)" or "..., next AS (...)": still in the clause
+            if punct != "," and (identifier or "").lower() != "as":
+                return token.start()
+            closed = False
+    return 0
+
+
+def written_table(sql):
+    """Lower-cased table an INSERT/UPDATE/DELETE/DDL statement writes, or None."""
+    match = _WRITE_TARGET.match(sql, _after_with(sql))
+    return _table_name(match.group(1)) if match else None
+
+
+def estimate_size(value):
+    """Approximate bytes held by a result: containers plus their rows/values."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        for row in value:
+            size += estimate_size(row)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + estimate_size(item)
+    return size
+
+
+class QueryCache:
+    """Thread-safe LRU cache with per-entry TTL and a total byte budget."""
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (value, size, expires_at, stale_until, tables)
+        self._entries = OrderedDict()
+        self._by_table = {}  # table -> keys of the entries that read it
+        self._generations = {}  # table -> invalidation count, never reset
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0, "misses": 0, "stale_hits": 0, "evictions": 0,
+            "expirations": 0, "invalidations": 0, "raced_stores": 0,
+        }
+        _caches.add(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, key):
+        _, size, _, _, tables = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def _find(self, key):
+        """(entry, fresh) for key, dropping it once past its stale grace."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+        now = time.monotonic()
+        if entry[3] is not None and entry[3] <= now:
+            self._drop(key)
+            self._counters["expirations"] += 1
+            return None, False
+        return entry, entry[2] is None or entry[2] > now
+
+    def lookup(self, key):
+        """Cached value for key, or MISS if absent or expired."""
+        with self._lock:
+            entry, fresh = self._find(key)
+            if not fresh:
+                self._counters["misses"] += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry[0]
+
+    def lookup_stale(self, key):
+        """
+        (value, fresh) for key: an expired entry still inside its stale grace
+        comes back with fresh=False; (MISS, False) when there is nothing.
+        """
+        with self._lock:
+            entry, fresh = self._find(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return MISS, False
+            self._entries.move_to_end(key)
+            self._counters["hits" if fresh else "stale_hits"] += 1
+            return entry[0], fresh
+
+    def generations(self, tables):
+        """((table, generation), ...) to hand to store() once the query ran."""
+        with self._lock:
+            return tuple(sorted((t, self._generations.get(t, 0)) for t in tables))
+
+    def store(self, key, value, ttl=None, tables=(), stale=0, generations=None):
+        """
+        Cache value under key; ttl overrides the cache default, 0 never expires.
+        tables are the tables the result was read from, for invalidation;
+        stale keeps the entry that many seconds past its ttl for lookup_stale.
+        generations, from generations() before the query ran, make the store
+        a no-op (returning False) if any of those tables was invalidated since.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return False  # would evict everything and still not fit
+        expires_at = time.monotonic() + ttl if ttl else None
+        stale_until = expires_at + stale if expires_at is not None else None
+        tables = frozenset(tables)
+        with self._lock:
+            if generations is not None and any(
+                self._generations.get(t, 0) != g for t, g in generations
+            ):
+                self._counters["raced_stores"] += 1
+                return False
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, expires_at, stale_until, tables)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+        return True
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def invalidate_tables(self, tables):
+        """Evict the entries that read any of tables; returns how many."""
+        with self._lock:
+            keys = set()
+            for table in tables:
+                table = table.lower()
+                self._generations[table] = self._generations.get(table, 0) + 1
+                keys |= self._by_table.get(table, set())
+            for key in keys:
+                self._drop(key)
+            self._counters["invalidations"] += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Counters plus current entries and bytes."""
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._bytes)
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share it."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0  # callers served by another caller's execution
+
+    def _run(self, key, call, fn):
+        try:
+            call.value = fn()
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+    def do(self, key, fn):
+        """fn() for the first caller; later callers wait for and share its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                self.shared += 1
+                leader = False
+        if leader:
+            return self._run(key, call, fn)
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    def do_async(self, key, fn):
+        """Start fn() on a daemon thread unless key is already in flight."""
+        with self._lock:
+            if key in self._calls:
+                return False
+            call = self._calls[key] = _Call()
+        threading.Thread(target=self._refresh, args=(key, call, fn), daemon=True).start()
+        return True
+
+    def _refresh(self, key, call, fn):
+        try:
+            self._run(key, call, fn)
+        except Exception as err:
+            print(f"[CACHE] Background refresh failed: {err}")
+
+
+def invalidate_tables(tables):
+    """Evict entries reading any of tables from every live QueryCache."""
+    tables = list(tables)
+    return sum(cache.invalidate_tables(tables) for cache in list(_caches))
+
+
+def _default_cache():
+    """
+    The shared cache behind cache_query, from QUERY_CACHE_* env vars:
+    QUERY_CACHE_BACKEND=memory (this process) or sqlite (a file shared by the
+    processes on this host, QUERY_CACHE_PATH; see sqlite_cache.py).
+    """
+    limits = {}
+    for name, env in (("max_entries", "QUERY_CACHE_MAX_ENTRIES"),
+                      ("max_bytes", "QUERY_CACHE_MAX_BYTES")):
+        if env in os.environ:
+            limits[name] = int(os.environ[env])
+    if "QUERY_CACHE_TTL" in os.environ:
+        limits["ttl"] = float(os.environ["QUERY_CACHE_TTL"])
+    backend = os.environ.get("QUERY_CACHE_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        from sqlite_cache import DEFAULT_PATH, SQLiteResultStore
+        return SQLiteResultStore(os.environ.get("QUERY_CACHE_PATH", DEFAULT_PATH), **limits)
+    if backend == "memory":
+        return QueryCache(**limits)
+    raise ValueError(f"Unknown QUERY_CACHE_BACKEND: {backend!r}")
+
+
+query_cache = _default_cache()
+query_flights = SingleFlight()
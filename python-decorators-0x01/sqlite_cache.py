@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+SQLite-file result store that several processes on one host can share.
+
+SQLiteResultStore has the same interface as result_cache.QueryCache, so
+cache_query can use either (QUERY_CACHE_BACKEND=sqlite picks this one for
+the shared query_cache, with the file from QUERY_CACHE_PATH).
+
+- results are stored as tagged JSON (data only: unlike pickle, reading a
+  shared file can never run code) and zlib-compressed once they pass
+  COMPRESS_OVER bytes; results holding other types are not cached
+- every store is a single IMMEDIATE transaction: readers in any process see
+  the old entry or the new one, never a partial write
+- the file is bounded by max_entries and max_bytes (of stored blobs); least
+  recently used entries go first, expired ones before anything else
+- hit/miss counters are per process; entries and bytes are for the file
+- table generations (see result_cache) live in the file too, so a write
+  in one process keeps a racing read in another from storing old rows
+"""
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from result_cache import MISS, _caches
+
+DEFAULT_PATH = "query_cache.sqlite3"
+COMPRESS_OVER = 1024
+# a hit refreshes last_used at most this often, so hot reads stay read-only
+TOUCH_INTERVAL = 1.0
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS results (
+        key BLOB PRIMARY KEY,
+        value BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        expires_at REAL,
+        stale_until REAL,
+        last_used REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_results_last_used ON results (last_used)",
+    """
+    CREATE TABLE IF NOT EXISTS result_tables (
+        table_name TEXT NOT NULL,
+        key BLOB NOT NULL,
+        PRIMARY KEY (table_name, key)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS table_generations (
+        table_name TEXT PRIMARY KEY,
+        generation INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+)
+
+
+_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+
+def _plain(obj, strict=True):
+    """
+    obj as JSON-ready data; tuples, bytes and dicts become tagged objects.
+    Other types raise TypeError, or with strict=False are tagged by their
+    type name and repr (good enough to tell keys apart, not to rebuild them).
+    """
+    if type(obj) in _SCALARS:
+        return obj
+    if isinstance(obj, tuple):
+        if all(type(v) in _SCALARS for v in obj):
+            return {"t": list(obj)}
+        return {"t": [_plain(v, strict) for v in obj]}
+    if isinstance(obj, list):
+        return [_plain(v, strict) for v in obj]
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return {"b": base64.b64encode(obj).decode("ascii")}
+    if isinstance(obj, dict):
+        return {"d": [[_plain(k, strict), _plain(v, strict)] for k, v in obj.items()]}
+    if strict:
+        raise TypeError(f"{type(obj).__name__} values cannot go into the shared cache")
+    return {"r": [type(obj).__qualname__, repr(obj)]}
+
+
+def _encode(obj, strict=True):
+    data = _plain(obj, strict)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _digest(key):
+    # pickle output depends on object identity (memo references), so equal
+    # keys could hash apart; this encoding depends only on the values
+    return hashlib.sha1(_encode(key, strict=False)).digest()
+
+
+def _tagged(obj):
+    if "t" in obj:
+        return tuple(obj["t"])
+    if "b" in obj:
+        return base64.b64decode(obj["b"])
+    return {k: v for k, v in obj["d"]}
+
+
+def dumps(value):
+    data = _encode(value)
+    if len(data) > COMPRESS_OVER:
+        return b"z" + zlib.compress(data, 1)
+    return b"j" + data
+
+
+def loads(blob):
+    blob = bytes(blob)
+    data = zlib.decompress(blob[1:]) if blob[:1] == b"z" else blob[1:]
+    return json.loads(data, object_hook=_tagged)
+
+
+class SQLiteResultStore:
+    """Cross-process LRU/TTL result cache in one SQLite file."""
+
+    def __init__(self, path=DEFAULT_PATH, max_entries=10000,
+                 max_bytes=256 * 1024 * 1024, ttl=300.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0, "misses": 0, "stale_hits": 0, "evictions": 0,
+            "expirations": 0, "invalidations": 0, "raced_stores": 0,
+        }
+        conn = self._conn()
+        with conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+        _caches.add(self)
+
+    def _conn(self):
+        """This thread's connection (sqlite3 connections are per thread)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._counters[key] += n
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    @staticmethod
+    def _delete(conn, digests):
+        conn.executemany("DELETE FROM results WHERE key = ?", [(d,) for d in digests])
+        conn.executemany("DELETE FROM result_tables WHERE key = ?", [(d,) for d in digests])
+
+    def _find(self, key):
+        conn = self._conn()
+        digest = _digest(key)
+        row = conn.execute(
+            "SELECT value, expires_at, stale_until, last_used FROM results WHERE key = ?",
+            (digest,),
+        ).fetchone()
+        if row is None:
+            return MISS, False
+        value, expires_at, stale_until, last_used = row
+        now = time.time()
+        if stale_until is not None and stale_until <= now:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # only if still expired: another process may have just stored it
+                expired = conn.execute(
+                    "DELETE FROM results WHERE key = ? AND stale_until <= ?", (digest, now)
+                ).rowcount
+                if expired:
+                    conn.execute("DELETE FROM result_tables WHERE key = ?", (digest,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._count("expirations", expired)
+            return MISS, False
+        if now - last_used > TOUCH_INTERVAL:
+            conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, digest))
+        return loads(value), expires_at is None or expires_at > now
+
+    def lookup(self, key):
+        """Cached value for key, or MISS if absent or expired."""
+        value, fresh = self._find(key)
+        if not fresh:
+            self._count("misses")
+            return MISS
+        self._count("hits")
+        return value
+
+    def lookup_stale(self, key):
+        """(value, fresh), serving expired entries inside their stale grace."""
+        value, fresh = self._find(key)
+        if value is MISS:
+            self._count("misses")
+        else:
+            self._count("hits" if fresh else "stale_hits")
+        return value, fresh
+
+    @staticmethod
+    def _generations(conn, tables):
+        current = dict(conn.execute(
+            "SELECT table_name, generation FROM table_generations WHERE table_name IN "
+            f"({', '.join('?' * len(tables))})",
+            list(tables),
+        )) if tables else {}
+        return tuple(sorted((t, current.get(t, 0)) for t in tables))
+
+    def generations(self, tables):
+        """((table, generation), ...) to hand to store(); see QueryCache."""
+        return self._generations(self._conn(), [t.lower() for t in tables])
+
+    def store(self, key, value, ttl=None, tables=(), stale=0, generations=None):
+        """Cache value under key, then evict down to the limits; see QueryCache."""
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            blob = dumps(value)
+        except TypeError:
+            return False
+        if len(blob) > self.max_bytes:
+            return False
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        stale_until = expires_at + stale if expires_at is not None else None
+        digest = _digest(key)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if generations is not None and (
+                self._generations(conn, [t for t, _ in generations]) != tuple(generations)
+            ):
+                conn.execute("ROLLBACK")
+                self._count("raced_stores")
+                return False
+            self._delete(conn, [digest])
+            conn.execute(
+                "INSERT INTO results (key, value, size, expires_at, stale_until, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, blob, len(blob), expires_at, stale_until, now),
+            )
+            conn.executemany(
+                "INSERT INTO result_tables (table_name, key) VALUES (?, ?)",
+                [(table.lower(), digest) for table in set(tables)],
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def _evict(self, conn, now):
+        expired = [d for (d,) in conn.execute(
+            "SELECT key FROM results WHERE stale_until <= ?", (now,)
+        )]
+        self._delete(conn, expired)
+        self._count("expirations", len(expired))
+        entries, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        if entries <= self.max_entries and total <= self.max_bytes:
+            return
+        victims = []
+        for digest, size in conn.execute("SELECT key, size FROM results ORDER BY last_used"):
+            if entries <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append(digest)
+            entries -= 1
+            total -= size
+        self._delete(conn, victims)
+        self._count("evictions", len(victims))
+
+    def invalidate(self, key):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._delete(conn, [_digest(key)])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def invalidate_tables(self, tables):
+        """Evict entries that read any of tables, for every process sharing the file."""
+        names = [(table.lower(),) for table in tables]
+        if not names:
+            return 0
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO table_generations (table_name, generation) VALUES (?, 1) "
+                "ON CONFLICT (table_name) DO UPDATE SET generation = generation + 1",
+                names,
+            )
+            digests = set()
+            for name in names:
+                digests.update(d for (d,) in conn.execute(
+                    "SELECT key FROM result_tables WHERE table_name = ?", name
+                ))
+            self._delete(conn, digests)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._count("invalidations", len(digests))
+        return len(digests)
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM results")
+            conn.execute("DELETE FROM result_tables")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self):
+        """Per-process counters plus entries and bytes in the shared file."""
+        entries, total = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        with self._lock:
+            return dict(self._counters, entries=entries, bytes=total)
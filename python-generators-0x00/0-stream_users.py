@@ -3,30 +3,75 @@
 Generator that streams rows one by one from MySQL.
 - Uses a single loop in the generator.
 - Yields dicts: {'user_id': ..., 'name': ..., 'email': ..., 'age': ...}
+  or, with compact=True, seed.UserRow named tuples.
+- Unbuffered by default: rows are pulled from the server `fetch_size` at a
+  time, so client memory stays flat regardless of table size.
+- snapshot=<path> reads from a local memory-mapped copy (see snapshot.py).
+- native_ages=True (default) truncates age to an integer in SQL, so the
+  driver never builds a Decimal and rows need no per-row conversion.
 """
 
-from seed import connect_to_prodev, TABLE_NAME
+from itertools import chain
 
-def stream_users():
-    """Fetch rows one by one using a generator (single loop)."""
-    conn = connect_to_prodev()
-    cur = conn.cursor(dictionary=True)
+from seed import CSV_COLUMNS, get_backend, pooled_connection, TABLE_NAME, UserRow
+from snapshot import open_snapshot
+
+DEFAULT_FETCH_SIZE = 500
+
+def _coerce_age(age):
+    # coerce DECIMAL to int if it looks integral, to match sample output
     try:
-        cur.execute(f"SELECT user_id, name, email, age FROM {TABLE_NAME}")
-        # one loop; cursor is iterable row-by-row without loading all rows
-        for row in cur:
-            # coerce DECIMAL to int if it looks integral, to match sample output
-            age = row["age"]
+        return int(age)
+    except Exception:
+        return age
+
+def _as_dict(row):
+    user_id, name, email, age = row
+    return {"user_id": user_id, "name": name, "email": email, "age": _coerce_age(age)}
+
+def _as_compact(row):
+    user_id, name, email, age = row
+    return UserRow(user_id, name, email, _coerce_age(age))
+
+def _as_dict_native(row):
+    return dict(zip(CSV_COLUMNS, row))
+
+def stream_users(unbuffered=True, fetch_size=DEFAULT_FETCH_SIZE, compact=False,
+                 snapshot=None, native_ages=True):
+    """
+    Fetch rows one by one using a generator (single loop).
+
+    unbuffered=True asks mysql-connector for a streaming (server-side) result
+    instead of buffering the whole result set on the client at execute time.
+    fetch_size is the fetch-ahead window: rows read from the socket per round.
+    compact=True yields UserRow tuples instead of dicts. Either way rows come
+    off a plain tuple cursor, so each row is built exactly once.
+    snapshot=<path> scans the mapped snapshot instead, refreshing it first
+    if user_data changed since it was taken.
+    native_ages=False fetches the DECIMAL and converts it per row instead.
+    """
+    if snapshot:
+        with open_snapshot(snapshot) as snap:
+            yield from snap.users(compact)
+        return
+    if native_ages:
+        age = f"{get_backend().as_int('age')} AS age"
+        make_row = UserRow._make if compact else _as_dict_native
+    else:
+        age = "age"
+        make_row = _as_compact if compact else _as_dict
+    with pooled_connection() as conn:
+        cur = conn.cursor(buffered=not unbuffered)
+        try:
+            cur.execute(f"SELECT user_id, name, email, {age} FROM {TABLE_NAME}")
+            # one loop; at most fetch_size rows are held client-side at a time
+            rows = chain.from_iterable(iter(lambda: cur.fetchmany(fetch_size), []))
+            for row in rows:
+                yield make_row(row)
+        finally:
             try:
-                age = int(age)
+                cur.close()
             except Exception:
+                # unread streaming rows left behind by an early exit; the pool
+                # drops this connection rather than draining them
                 pass
-            yield {
-                "user_id": row["user_id"],
-                "name": row["name"],
-                "email": row["email"],
-                "age": age,
-            }
-    finally:
-        cur.close()
-        conn.close()
@@ -3,39 +3,126 @@
 Batch processing of large user_data table using generators.
 
 Functions:
-- stream_users_in_batches(batch_size): fetch rows in batches from user_data using yield
+- stream_users_in_batches(batch_size, filters, columns, prefetch): fetch rows in
+  batches from user_data using yield, with filters/projection pushed into the
+  SQL and optional background prefetching of the next batches
 - batch_processing(batch_size): process each batch to filter users over the age of 25
+- stream_user_columns(batch_size, filters, columns, arrow): the same batches as
+  one array per column (NumPy, or an Arrow RecordBatch with arrow=True)
+- batch_processing_columnar(batch_size): vectorized over-25 filter on those arrays
 """
 
-from seed import connect_to_prodev
+from prefetch import prefetched
+from seed import CSV_COLUMNS, build_select, pooled_connection
 
+# fixed-width NumPy dtypes for the columnar path; text columns stay objects
+COLUMN_DTYPES = {
+    "user_id": "S36",
+    "age": "float64",
+}
 
-def stream_users_in_batches(batch_size):
-    """Generator that fetches rows in batches from user_data"""
-    conn = connect_to_prodev()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute("SELECT user_id, name, email, age FROM user_data")
-        while True:  # loop #1
-            rows = cursor.fetchmany(batch_size)
-            if not rows:
-                break
-            yield rows  # generator yields batch
-    finally:
-        cursor.close()
-        conn.close()
+# int(age) > 25 holds exactly when age >= 26, and unlike int() it can be
+# evaluated by MySQL, so only matching rows ever cross the wire
+OVER_25 = ("age", ">=", 26)
+
+
+def stream_users_in_batches(batch_size, filters=None, columns=None, prefetch=0):
+    """
+    Generator that fetches rows in batches from user_data.
+
+    filters/columns are compiled into the WHERE clause and SELECT list by
+    seed.build_select; only predicates it cannot push down (callables) run
+    here, per row, and batches they empty out are skipped.
+    prefetch=N reads up to N batches ahead on a background thread.
+    """
+    if prefetch:
+        batches = stream_users_in_batches(batch_size, filters, columns)
+        yield from prefetched(batches, prefetch)
+        return
+    query, params, python_predicates = build_select(columns, filters)
+    with pooled_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, params)
+            while True:  # loop #1
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if python_predicates:
+                    rows = [r for r in rows if all(p(r) for p in python_predicates)]
+                    if not rows:
+                        continue
+                yield rows  # generator yields batch
+        finally:
+            cursor.close()
     return  # explicit return to satisfy checker
 
 
 def batch_processing(batch_size):
     """Processes each batch and prints users over the age of 25"""
-    for batch in stream_users_in_batches(batch_size):  # loop #2
+    for batch in stream_users_in_batches(batch_size, filters=[OVER_25]):  # loop #2
         for user in batch:  # loop #3
-            try:
-                age = int(user.get("age", 0))
-            except Exception:
-                age = 0
-            if age > 25:
-                print(user)
-                print()  # blank line for readability
+            print(user)
+            print()  # blank line for readability
     return  # explicit return to satisfy checker
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as err:
+        raise ImportError("columnar batches need numpy: pip install numpy") from err
+    return numpy
+
+
+def _to_columns(np, names, rows):
+    """Transpose fetched row tuples into one contiguous array per column"""
+    columns = {}
+    for name, values in zip(names, zip(*rows)):
+        columns[name] = np.array(values, dtype=COLUMN_DTYPES.get(name, object))
+    return columns
+
+
+def stream_user_columns(batch_size, filters=None, columns=None, arrow=False):
+    """
+    Generator of columnar batches: {column: numpy array}, ages as float64
+    and user_ids as fixed-width bytes, built straight from tuple rows.
+    arrow=True yields pyarrow.RecordBatch objects instead.
+    Filters must be pushable into SQL; filter further with array masks.
+    """
+    np = _numpy()
+    if arrow:
+        try:
+            import pyarrow
+        except ImportError as err:
+            raise ImportError("arrow batches need pyarrow: pip install pyarrow") from err
+    names = list(columns or CSV_COLUMNS)
+    query, params, python_predicates = build_select(names, filters)
+    if python_predicates:
+        raise ValueError("columnar batches only take filters that push down to SQL")
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                batch = _to_columns(np, names, rows)
+                if arrow:
+                    batch = pyarrow.RecordBatch.from_arrays(
+                        [pyarrow.array(batch[name]) for name in names], names=names
+                    )
+                yield batch
+        finally:
+            cursor.close()
+
+
+def batch_processing_columnar(batch_size):
+    """Yield columnar batches holding only users over the age of 25"""
+    np = _numpy()
+    for batch in stream_user_columns(batch_size):
+        # same cut as int(age) > 25, evaluated for the whole batch at once
+        mask = np.trunc(batch["age"]) > 25
+        if mask.any():
+            yield {name: values[mask] for name, values in batch.items()}
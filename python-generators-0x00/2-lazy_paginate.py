@@ -3,32 +3,98 @@
 Lazy pagination from the user_data table using generators.
 
 Functions:
-- paginate_users(page_size, offset): fetches a single page of data
-- lazy_paginate(page_size): generator that lazily fetches pages one by one
+- paginate_users(page_size, offset, after_id): fetches a single page of data
+- lazy_paginate(page_size, keyset, cursor, prefetch): generator that lazily fetches pages one by one
+- encode_cursor(user_id) / decode_cursor(token): resumable keyset cursor tokens
+- next_cursor(page): token that resumes right after the given page
 """
 
-from seed import connect_to_prodev
+import base64
 
+from prefetch import prefetched
+from seed import pooled_connection
 
-def paginate_users(page_size, offset):
-    """Fetch one page of results from user_data"""
-    conn = connect_to_prodev()
-    cursor = conn.cursor(dictionary=True)
+CURSOR_PREFIX = "uid:"
+
+
+def encode_cursor(user_id):
+    """Turn the last user_id seen into an opaque, URL-safe cursor token"""
+    raw = f"{CURSOR_PREFIX}{user_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(token):
+    """Return the user_id stored in a cursor token (ValueError if malformed)"""
     try:
-        query = f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}"
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        return rows
-    finally:
-        cursor.close()
-        conn.close()
+        raw = base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8")
+    except Exception as err:
+        raise ValueError(f"Invalid cursor token: {token!r}") from err
+    if not raw.startswith(CURSOR_PREFIX):
+        raise ValueError(f"Invalid cursor token: {token!r}")
+    return raw[len(CURSOR_PREFIX):]
+
+
+def next_cursor(page):
+    """Cursor token that resumes right after the last row of `page`"""
+    if not page:
+        return None
+    return encode_cursor(page[-1]["user_id"])
 
 
-def lazy_paginate(page_size):
+def paginate_users(page_size, offset=0, after_id=None):
+    """
+    Fetch one page of results from user_data.
+    With after_id set, seeks past that user_id on the primary key
+    (keyset pagination) instead of scanning and discarding `offset` rows.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            if after_id is None:
+                query = (
+                    "SELECT user_id, name, email, age FROM user_data "
+                    f"LIMIT {page_size} OFFSET {offset}"
+                )
+                cursor.execute(query)
+            else:
+                query = (
+                    "SELECT user_id, name, email, age FROM user_data "
+                    "WHERE user_id > %s "
+                    "ORDER BY user_id LIMIT %s"
+                )
+                cursor.execute(query, (after_id, page_size))
+            rows = cursor.fetchall()
+            return rows
+        finally:
+            cursor.close()
+
+
+def lazy_paginate(page_size, keyset=False, cursor=None, prefetch=0):
     """
     Generator that lazily fetches user_data pages.
     Starts from offset 0 and fetches the next page only when needed.
+
+    keyset=True walks the table in user_id order, resuming each page from the
+    last user_id seen, so every page costs one index seek regardless of depth.
+    Pass a token from next_cursor() as `cursor` to resume an earlier walk.
+    prefetch=N fetches up to N pages ahead on a background thread.
     """
+    if prefetch:
+        yield from prefetched(lazy_paginate(page_size, keyset, cursor), prefetch)
+        return
+    if cursor is not None:
+        keyset = True
+    if keyset:
+        # "" sorts before every CHAR(36) user_id, so it seeks to the first row
+        after_id = decode_cursor(cursor) if cursor is not None else ""
+        while True:
+            page = paginate_users(page_size, after_id=after_id)
+            if not page:
+                break
+            yield page
+            after_id = page[-1]["user_id"]
+        return
+
     offset = 0
     while True:
         page = paginate_users(page_size, offset)
@@ -3,29 +3,88 @@
 Memory-efficient average age:
 - stream_user_ages(): yields ages one-by-one (loop #1)
 - main aggregation loop computes average without loading all rows (loop #2)
+- stream_column(column): the same generator for any numeric column
+- column_stats(column, ...): count/mean/variance/min/max/percentiles, from
+  a streamed scan (constant memory) or pushed into SQL aggregates
+- stream_user_ages(snapshot=<path>) reads a local mapped copy (snapshot.py)
+- native=True (default) lets SQL truncate ages to integers, skipping the
+  per-row Decimal construction and conversion
+- column_stats() streams the exact values (exact=True), so its streamed and
+  pushed-down results agree; only the printed average uses truncated ages
 
 Output format:
   Average age of users: <value>
 """
 
-from seed import connect_to_prodev, TABLE_NAME
-
-def stream_user_ages():
-    """Yield ages one by one from MySQL."""
-    conn = connect_to_prodev()
-    cur = conn.cursor()
-    try:
-        cur.execute(f"SELECT age FROM {TABLE_NAME}")
-        for (age,) in cur:  # loop #1
-            # cur returns Decimal for DECIMAL column; cast to float or int
-            try:
-                age_val = int(age)
-            except Exception:
-                age_val = float(age)
-            yield age_val
-    finally:
-        cur.close()
-        conn.close()
+from seed import get_backend, pooled_connection, TABLE_NAME
+from snapshot import open_snapshot
+from stats import DEFAULT_PERCENTILES, RunningStats, summarize
+
+NUMERIC_COLUMNS = ("age",)
+
+def stream_column(column="age", native=True, exact=False):
+    """
+    Yield the values of one numeric user_data column one by one.
+    native=True decodes straight to int: the column is truncated in SQL, the
+    same value int(Decimal) gives, so the cursor hands over plain integers.
+    exact=True yields every value untruncated, as float.
+    """
+    if column not in NUMERIC_COLUMNS:
+        raise ValueError(f"Not a numeric column: {column!r}")
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            if exact:
+                cur.execute(f"SELECT {column} FROM {TABLE_NAME}")
+                yield from (float(value) for (value,) in cur)
+                return
+            if native:
+                cur.execute(f"SELECT {get_backend().as_int(column)} FROM {TABLE_NAME}")
+                yield from (value for (value,) in cur)
+                return
+            cur.execute(f"SELECT {column} FROM {TABLE_NAME}")
+            for (value,) in cur:  # loop #1
+                # cur returns Decimal for DECIMAL column; cast to float or int
+                try:
+                    num = int(value)
+                except Exception:
+                    num = float(value)
+                yield num
+        finally:
+            cur.close()
+
+def stream_user_ages(snapshot=None, native=True):
+    """Yield ages one by one from MySQL (or from a snapshot file path)."""
+    if snapshot:
+        with open_snapshot(snapshot) as snap:
+            yield from snap.ages()
+        return
+    yield from stream_column("age", native)
+
+def sql_stats(column="age"):
+    """Let MySQL compute count/mean/variance/min/max in one aggregate query."""
+    if column not in NUMERIC_COLUMNS:
+        raise ValueError(f"Not a numeric column: {column!r}")
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                f"SELECT COUNT({column}), AVG({column}), VAR_POP({column}), "
+                f"MIN({column}), MAX({column}) FROM {TABLE_NAME}"
+            )
+            return RunningStats.from_aggregates(*cur.fetchone())
+        finally:
+            cur.close()
+
+def column_stats(column="age", percentiles=DEFAULT_PERCENTILES, pushdown=False):
+    """
+    Summary statistics for a numeric column as a dict.
+    pushdown=True returns SQL aggregates only; MySQL has no percentile
+    aggregate, so percentiles need the streamed sketch (pushdown=False).
+    """
+    if pushdown:
+        return sql_stats(column).as_dict()
+    return summarize(stream_column(column, exact=True)).as_dict(percentiles)
 
 if __name__ == "__main__":
     total = 0.0
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Python Generators project.
+
+Run against a seeded ALX_prodev database (or, with USER_DATA_BACKEND=sqlite,
+the embedded SQLite stand-in; no MySQL server needed):
+  ./benchmarks.py suite [rows] [page_size]
+  ./benchmarks.py pagination [page_size]
+  ./benchmarks.py memory [fetch_size]
+  ./benchmarks.py pushdown [batch_size] [min_age]
+  ./benchmarks.py rows [sample_rows]
+  ./benchmarks.py parallel [max_parts] [processes]
+  ./benchmarks.py columnar [batch_size]   (needs numpy)
+  ./benchmarks.py snapshot [repeats]
+  ./benchmarks.py decode [repeats]
+  ./benchmarks.py export [max_workers]
+
+Each benchmark prints one line per variant so runs can be diffed; `suite`
+prints one JSON object per generator.
+"""
+
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+import export
+import parallel_scan
+import snapshot
+import seed
+from seed import pooled_connection
+
+stream_users_mod = __import__("0-stream_users")
+batch_processing_mod = __import__("1-batch_processing")
+stream_ages_mod = __import__("4-stream_ages")
+lazy_paginate_mod = __import__("2-lazy_paginate")
+
+
+def _walk(pages):
+    """Consume a page generator; return (rows, per-page latencies)"""
+    rows = 0
+    latencies = []
+    start = time.perf_counter()
+    for page in pages:
+        now = time.perf_counter()
+        latencies.append(now - start)
+        rows += len(page)
+        start = time.perf_counter()
+    return rows, latencies
+
+
+def _report(label, rows, latencies):
+    total = sum(latencies)
+    last = latencies[-1] if latencies else 0.0
+    worst = max(latencies) if latencies else 0.0
+    rate = rows / total if total else 0.0
+    print(
+        f"{label:<12} rows={rows} pages={len(latencies)} "
+        f"total={total:.3f}s rows/s={rate:,.0f} "
+        f"last_page={last * 1000:.2f}ms worst_page={worst * 1000:.2f}ms"
+    )
+
+
+def bench_pagination(page_size=1000):
+    """Full-table walk: LIMIT/OFFSET pages vs keyset (seek) pages"""
+    rows, lat = _walk(lazy_paginate_mod.lazy_paginate(page_size))
+    _report("offset", rows, lat)
+    rows, lat = _walk(lazy_paginate_mod.lazy_paginate(page_size, keyset=True))
+    _report("keyset", rows, lat)
+
+
+def _memory_profile(rows, checkpoints):
+    """Peak traced bytes seen between successive row-count checkpoints"""
+    peaks = []
+    seen = 0
+    tracemalloc.start()
+    try:
+        for _ in rows:
+            seen += 1
+            if seen in checkpoints:
+                peaks.append((seen, tracemalloc.get_traced_memory()[1]))
+                tracemalloc.reset_peak()
+        peaks.append((seen, tracemalloc.get_traced_memory()[1]))
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def bench_stream_memory(fetch_size=stream_users_mod.DEFAULT_FETCH_SIZE):
+    """
+    Peak client memory of stream_users, buffered vs unbuffered.
+
+    Unbuffered peaks must stay flat as more rows are streamed; a buffered
+    cursor pays for the whole result set up front.
+    """
+    checkpoints = {10 ** k for k in range(3, 8)}
+    # open the pooled connection up front so its setup is not traced
+    with pooled_connection():
+        pass
+    for label, unbuffered in (("buffered", False), ("unbuffered", True)):
+        rows = stream_users_mod.stream_users(unbuffered, fetch_size)
+        peaks = _memory_profile(rows, checkpoints)
+        flat = max(p for _, p in peaks) <= 2 * min(p for _, p in peaks)
+        detail = " ".join(f"{n}:{peak / 1024:.0f}KiB" for n, peak in peaks)
+        print(f"{label:<12} flat={'yes' if flat else 'no'} peaks {detail}")
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"max RSS {maxrss / 1024:.1f}MiB")
+
+
+def bench_pushdown(batch_size=1000, min_age=26):
+    """Age filter applied in Python after a full scan vs pushed into WHERE"""
+    variants = (
+        ("python", [lambda row: int(row["age"]) >= min_age]),
+        ("pushdown", [("age", ">=", min_age)]),
+    )
+    for label, filters in variants:
+        start = time.perf_counter()
+        cpu = time.process_time()
+        rows = sum(
+            len(batch) for batch in
+            batch_processing_mod.stream_users_in_batches(batch_size, filters)
+        )
+        cpu = time.process_time() - cpu
+        wall = time.perf_counter() - start
+        print(f"{label:<12} rows={rows} wall={wall:.3f}s cpu={cpu:.3f}s")
+
+
+def _bytes_per_row(rows, sample):
+    """Traced bytes retained per row when `sample` rows are kept alive"""
+    tracemalloc.start()
+    try:
+        kept = [row for _, row in zip(range(sample), rows)]
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return retained / len(kept) if kept else 0.0
+
+
+def bench_rows(sample_rows=100000):
+    """stream_users dict rows vs compact UserRow: rows/sec and bytes/row"""
+    with pooled_connection():
+        pass
+    for label, compact in (("dict", False), ("compact", True)):
+        start = time.perf_counter()
+        rows = sum(1 for _ in stream_users_mod.stream_users(compact=compact))
+        wall = time.perf_counter() - start
+        per_row = _bytes_per_row(
+            stream_users_mod.stream_users(compact=compact), sample_rows
+        )
+        rate = rows / wall if wall else 0.0
+        print(
+            f"{label:<12} rows={rows} rows/s={rate:,.0f} "
+            f"bytes/row={per_row:.0f}"
+        )
+
+
+def bench_parallel(max_parts=8, processes=0):
+    """Range-partitioned average_age at 1, 2, 4, ... parts: scaling curve"""
+    parts = 1
+    base = None
+    while parts <= max_parts:
+        start = time.perf_counter()
+        avg = parallel_scan.average_age(parts, processes=bool(processes))
+        wall = time.perf_counter() - start
+        base = base or wall
+        print(
+            f"parts={parts:<4} wall={wall:.3f}s speedup={base / wall:.2f}x "
+            f"avg={avg:.4f}"
+        )
+        parts *= 2
+
+
+def bench_columnar(batch_size=10000):
+    """Over-25 count and mean age: dict batches in Python vs NumPy columns"""
+    batch_processing_mod._numpy()  # keep the numpy import out of the timing
+    start = time.perf_counter()
+    count, total = 0, 0.0
+    for batch in batch_processing_mod.stream_users_in_batches(batch_size):
+        for user in batch:
+            age = float(user["age"])
+            if int(age) > 25:
+                count += 1
+                total += age
+    wall = time.perf_counter() - start
+    print(f"{'dict':<12} matched={count} mean={total / max(count, 1):.4f} wall={wall:.3f}s")
+
+    start = time.perf_counter()
+    count, total = 0, 0.0
+    for batch in batch_processing_mod.batch_processing_columnar(batch_size):
+        count += len(batch["age"])
+        total += float(batch["age"].sum())
+    wall = time.perf_counter() - start
+    print(f"{'columnar':<12} matched={count} mean={total / max(count, 1):.4f} wall={wall:.3f}s")
+
+
+def bench_snapshot(repeats=3):
+    """Repeated full scans: MySQL every time vs the mapped snapshot"""
+    path = snapshot.DEFAULT_PATH
+    start = time.perf_counter()
+    rows = snapshot.dump_snapshot(path)
+    print(f"{'dump':<12} rows={rows} wall={time.perf_counter() - start:.3f}s")
+    variants = (
+        ("users/db", lambda: stream_users_mod.stream_users(compact=True)),
+        ("users/snap", lambda: stream_users_mod.stream_users(compact=True, snapshot=path)),
+        ("ages/db", lambda: stream_ages_mod.stream_user_ages()),
+        ("ages/snap", lambda: stream_ages_mod.stream_user_ages(snapshot=path)),
+    )
+    for label, scan in variants:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            rows = sum(1 for _ in scan())
+        wall = (time.perf_counter() - start) / repeats
+        print(f"{label:<12} rows={rows} per_scan={wall:.3f}s rows/s={rows / wall:,.0f}")
+
+
+def bench_decode(repeats=3):
+    """Age column and full rows: Decimal decode + convert vs native ints"""
+    with pooled_connection():
+        pass
+    variants = (
+        ("ages/decimal", lambda: stream_ages_mod.stream_user_ages(native=False)),
+        ("ages/native", lambda: stream_ages_mod.stream_user_ages()),
+        ("users/decimal", lambda: stream_users_mod.stream_users(native_ages=False)),
+        ("users/native", lambda: stream_users_mod.stream_users()),
+    )
+    for label, scan in variants:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            rows = sum(1 for _ in scan())
+        wall = (time.perf_counter() - start) / repeats
+        per_row = wall / rows * 1e9 if rows else 0.0
+        print(f"{label:<14} rows={rows} per_scan={wall:.3f}s ns/row={per_row:,.0f}")
+
+
+def bench_export(max_workers=8):
+    """Sharded CSV export at 1, 2, 4, ... workers: throughput scaling"""
+    workers = 1
+    base = None
+    with tempfile.TemporaryDirectory() as root:
+        while workers <= max_workers:
+            result = export.export_users(os.path.join(root, str(workers)), workers, workers)
+            base = base or result["rows_per_sec"]
+            print(
+                f"workers={workers:<4} rows={result['rows']} "
+                f"wall={result['seconds']:.3f}s rows/s={result['rows_per_sec']:,.0f} "
+                f"speedup={result['rows_per_sec'] / base:.2f}x "
+                f"MiB={result['bytes'] / 2 ** 20:.1f}"
+            )
+            workers *= 2
+
+
+def _seed_synthetic(rows):
+    """Top user_data up to `rows` rows of synthetic users via insert_data"""
+    with pooled_connection() as conn, contextlib.redirect_stdout(sys.stderr):
+        seed.create_table(conn)
+        missing = rows - seed.table_row_count(conn)
+        if missing <= 0:
+            return
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        try:
+            with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(seed.CSV_COLUMNS)
+                for i in range(missing):
+                    writer.writerow(
+                        (str(uuid.uuid4()), f"User {i}", f"user{i}@example.com", 18 + i % 83)
+                    )
+            start = time.perf_counter()
+            seed.insert_data(conn, path, chunk_size=10000, skip_unchanged=False)
+            wall = time.perf_counter() - start
+            print(json.dumps({
+                "case": "seed",
+                "rows": missing,
+                "seconds": round(wall, 3),
+                "rows_per_sec": round(missing / wall),
+            }), file=sys.__stdout__)
+        finally:
+            os.remove(path)
+
+
+class _PrintedRows:
+    """stdout stand-in that counts the user dicts batch_processing prints"""
+
+    def __init__(self):
+        self.rows = 0
+
+    def write(self, text):
+        if text.startswith("{"):
+            self.rows += 1
+
+    def flush(self):
+        pass
+
+
+def _batch_processing_pages(page_size):
+    """batch_processing only prints; run it whole and report rows printed"""
+    sink = _PrintedRows()
+    with contextlib.redirect_stdout(sink):
+        batch_processing_mod.batch_processing(page_size)
+    yield [None] * sink.rows
+
+
+# case -> (make iterable(page_size), True if it yields pages rather than rows)
+SUITE_CASES = {
+    "stream_users": (lambda n: stream_users_mod.stream_users(), False),
+    "stream_users_compact": (
+        lambda n: stream_users_mod.stream_users(compact=True), False,
+    ),
+    "lazy_paginate_offset": (lambda n: lazy_paginate_mod.lazy_paginate(n), True),
+    "lazy_paginate_keyset": (
+        lambda n: lazy_paginate_mod.lazy_paginate(n, keyset=True), True,
+    ),
+    "stream_users_in_batches": (
+        lambda n: batch_processing_mod.stream_users_in_batches(n), True,
+    ),
+    "batch_processing": (_batch_processing_pages, True),
+    "stream_user_ages": (lambda n: stream_ages_mod.stream_user_ages(), False),
+}
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def _run_case(name, page_size):
+    """Child process: run one generator to exhaustion and measure it"""
+    make, paged = SUITE_CASES[name]
+    with pooled_connection():
+        pass
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    latencies = []
+    rows = 0
+    start = last = time.perf_counter()
+    for item in make(page_size):
+        rows += len(item) if paged else 1
+        # row generators are timed per page_size rows, page ones per page
+        if paged or rows % page_size == 0:
+            now = time.perf_counter()
+            latencies.append(now - last)
+            last = now
+    wall = time.perf_counter() - start
+    latencies.sort()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "case": name,
+        "backend": seed.get_backend().name,
+        "rows": rows,
+        "seconds": round(wall, 3),
+        "rows_per_sec": round(rows / wall) if wall else 0,
+        "peak_rss_mib": round(peak / 1024, 1),
+        "rss_growth_mib": round((peak - rss_before) / 1024, 1),
+        "page_p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "page_p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "page_max_ms": round((latencies[-1] if latencies else 0.0) * 1000, 3),
+    }
+
+
+def bench_suite(rows=1000000, page_size=1000):
+    """
+    Seed `rows` synthetic users if needed, then run every generator in its
+    own fresh process so peak RSS is per generator, printing JSON lines.
+    """
+    _seed_synthetic(rows)
+    ctx = multiprocessing.get_context("spawn")
+    for name in SUITE_CASES:
+        with ctx.Pool(1) as pool:
+            print(json.dumps(pool.apply(_run_case, (name, page_size))), flush=True)
+
+
+BENCHMARKS = {
+    "suite": bench_suite,
+    "pagination": bench_pagination,
+    "memory": bench_stream_memory,
+    "pushdown": bench_pushdown,
+    "rows": bench_rows,
+    "parallel": bench_parallel,
+    "columnar": bench_columnar,
+    "snapshot": bench_snapshot,
+    "decode": bench_decode,
+    "export": bench_export,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(f"usage: {sys.argv[0]} {{{','.join(BENCHMARKS)}}} [args...]")
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](*(int(a) for a in sys.argv[2:]))
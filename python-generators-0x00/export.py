@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Parallel streaming export of user_data to compressed shards.
+
+The table is split into user_id ranges (parallel_scan.key_ranges) and each
+worker process streams one range, batch by batch, into its own shard, so
+memory stays bounded by fetch_size rows per worker whatever the table size.
+- csv:     gzip-compressed CSV with a user_id,name,email,age header
+- parquet: zstd-compressed Parquet, one row group per batch (needs pyarrow)
+
+A manifest.json next to the shards lists every shard with its key range,
+row count, size and SHA-256, plus the totals, for consumers to verify.
+
+From the command line:
+  ./export.py <out_dir> [parts] [workers] [csv|parquet]
+"""
+
+import csv
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from parallel_scan import key_ranges, scan_range_batches
+from seed import CSV_COLUMNS, TABLE_NAME
+
+FORMATS = {"csv": ".csv.gz", "parquet": ".parquet"}
+MANIFEST = "manifest.json"
+DEFAULT_FETCH_SIZE = 10000
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as err:
+        raise ImportError("parquet export needs pyarrow: pip install pyarrow") from err
+    return pyarrow
+
+
+def _sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_csv(path, batches):
+    rows = 0
+    with gzip.open(path, "wt", newline="", encoding="utf-8", compresslevel=6) as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for batch in batches:
+            writer.writerows(batch)
+            rows += len(batch)
+    return rows
+
+
+def _write_parquet(path, batches):
+    pa = _pyarrow()
+    schema = pa.schema([
+        ("user_id", pa.string()),
+        ("name", pa.string()),
+        ("email", pa.string()),
+        # same as the columnar batches (1-batch_processing.COLUMN_DTYPES)
+        ("age", pa.float64()),
+    ])
+    rows = 0
+    with pa.parquet.ParquetWriter(path, schema, compression="zstd") as writer:
+        for batch in batches:
+            user_ids, names, emails, ages = zip(*batch)
+            writer.write_table(pa.table(
+                [user_ids, names, emails, [float(a) for a in ages]], schema=schema,
+            ))
+            rows += len(batch)
+    return rows
+
+
+def _export_range(bounds, path, fmt, fetch_size):
+    """Worker: stream one (low, high] range into `path`; returns its manifest entry"""
+    write = _write_parquet if fmt == "parquet" else _write_csv
+    tmp_path = f"{path}.tmp"
+    try:
+        rows = write(tmp_path, scan_range_batches(bounds, fetch_size=fetch_size))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return {
+        "file": os.path.basename(path),
+        "low": bounds[0],
+        "high": bounds[1],
+        "rows": rows,
+        "bytes": os.path.getsize(path),
+        "sha256": _sha256(path),
+    }
+
+
+def export_users(out_dir, parts=None, workers=None, fmt="csv",
+                 fetch_size=DEFAULT_FETCH_SIZE):
+    """
+    Export user_data into `out_dir` as one shard per key range, `workers`
+    processes at a time, and write the manifest. Returns the manifest dict.
+
+    Shards are written under a temporary name and renamed when complete; the
+    manifest is written last, so its presence marks a finished export.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    if fmt == "parquet":
+        _pyarrow()  # fail before any worker starts
+    parts = parts or os.cpu_count() or 1
+    os.makedirs(out_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    ranges = key_ranges(parts)
+    paths = [
+        os.path.join(out_dir, f"{TABLE_NAME}-{i:05d}-of-{len(ranges):05d}{FORMATS[fmt]}")
+        for i in range(len(ranges))
+    ]
+    with ProcessPoolExecutor(max_workers=workers or len(ranges)) as executor:
+        shards = list(executor.map(
+            _export_range,
+            ranges,
+            paths,
+            [fmt] * len(ranges),
+            [fetch_size] * len(ranges),
+        ))
+    elapsed = time.perf_counter() - started
+
+    total = sum(shard["rows"] for shard in shards)
+    manifest = {
+        "table": TABLE_NAME,
+        "format": fmt,
+        "columns": list(CSV_COLUMNS),
+        "rows": total,
+        "bytes": sum(shard["bytes"] for shard in shards),
+        "seconds": elapsed,
+        "rows_per_sec": total / elapsed if elapsed else 0.0,
+        "shards": shards,
+    }
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    return manifest
+
+
+def verify_export(out_dir):
+    """Re-check every shard in the manifest; returns the files that mismatch"""
+    with open(os.path.join(out_dir, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    bad = []
+    for shard in manifest["shards"]:
+        path = os.path.join(out_dir, shard["file"])
+        if not os.path.exists(path) or _sha256(path) != shard["sha256"]:
+            bad.append(shard["file"])
+    return bad
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"usage: {sys.argv[0]} <out_dir> [parts] [workers] [csv|parquet]")
+        sys.exit(1)
+    numbers = [int(a) for a in sys.argv[2:4]]
+    fmt = sys.argv[4] if len(sys.argv) > 4 else "csv"
+    result = export_users(sys.argv[1], *numbers, fmt=fmt)
+    print(
+        f"Exported {result['rows']} rows into {len(result['shards'])} {fmt} "
+        f"shards in {result['seconds']:.2f}s: {result['rows_per_sec']:,.0f} rows/sec"
+    )
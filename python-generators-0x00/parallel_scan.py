@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Range-partitioned parallel scan over user_data.
+
+The table is split into `parts` contiguous user_id ranges (cut points are
+read off the primary key index), and each range is streamed on its own
+pooled connection.
+- parallel_scan(): every row, merged into one iterator (thread pool)
+- parallel_reduce(): per-range partial results folded and then combined,
+  on a thread pool or, for CPU-heavy folds, a process pool
+- average_age(): the 4-stream_ages.py average computed that way
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import reduce
+
+from prefetch import interleaved
+from seed import TABLE_NAME, UserRow, build_select, get_pool, pooled_connection
+from stats import RunningStats
+
+DEFAULT_FETCH_SIZE = 1000
+
+
+def key_ranges(parts):
+    """
+    Split user_id into `parts` (low, high] ranges of roughly equal row count.
+    None stands for an open end; fewer ranges come back for tiny tables.
+    """
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}")
+            total = int(cur.fetchone()[0])
+            cuts = []
+            for i in range(1, parts):
+                # index-only walk along the primary key to the i-th cut point
+                cur.execute(
+                    f"SELECT user_id FROM {TABLE_NAME} ORDER BY user_id "
+                    f"LIMIT 1 OFFSET {total * i // parts}"
+                )
+                row = cur.fetchone()
+                if row and (not cuts or row[0] > cuts[-1]):
+                    cuts.append(row[0])
+        finally:
+            cur.close()
+    bounds = [None] + cuts + [None]
+    return list(zip(bounds, bounds[1:]))
+
+
+def _range_filters(bounds, filters):
+    low, high = bounds
+    filters = list(filters or ())
+    if low is not None:
+        filters.append(("user_id", ">", low))
+    if high is not None:
+        filters.append(("user_id", "<=", high))
+    return filters
+
+
+def scan_range_batches(bounds, filters=None, fetch_size=DEFAULT_FETCH_SIZE):
+    """
+    Yield lists of UserRow for one (low, high] user_id range. Callable
+    filters get each row as a dict, as in stream_users_in_batches().
+    """
+    query, params, python_predicates = build_select(
+        filters=_range_filters(bounds, filters)
+    )
+    with pooled_connection() as conn:
+        cur = conn.cursor(buffered=False)
+        try:
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(fetch_size)
+                if not rows:
+                    break
+                batch = [UserRow._make(row) for row in rows]
+                if python_predicates:
+                    batch = [
+                        r for r in batch
+                        if all(p(r._asdict()) for p in python_predicates)
+                    ]
+                if batch:
+                    yield batch
+        finally:
+            try:
+                cur.close()
+            except Exception:
+                # abandoned mid-range; the pool drops this connection
+                pass
+
+
+def _default_workers(parts):
+    # more threads than pooled connections would only queue on the pool
+    return max(1, min(parts, get_pool().max_size))
+
+
+def parallel_scan(parts=None, filters=None, workers=None,
+                  fetch_size=DEFAULT_FETCH_SIZE, prefetch=4):
+    """
+    Stream every user_data row (as UserRow) using `workers` threads, one range
+    and one connection per thread at a time. Row order is not preserved.
+    """
+    parts = parts or os.cpu_count() or 1
+    workers = workers or _default_workers(parts)
+    sources = (
+        scan_range_batches(bounds, filters, fetch_size)
+        for bounds in key_ranges(parts)
+    )
+    for batch in interleaved(sources, prefetch, workers):
+        yield from batch
+
+
+def _reduce_range(bounds, filters, initial, fold, fetch_size):
+    """Worker: fold every row of one range into a fresh accumulator"""
+    acc = initial()
+    for batch in scan_range_batches(bounds, filters, fetch_size):
+        for row in batch:
+            acc = fold(acc, row)
+    return acc
+
+
+def parallel_reduce(initial, fold, combine, parts=None, filters=None,
+                    workers=None, processes=False, fetch_size=DEFAULT_FETCH_SIZE):
+    """
+    Map-reduce over user_data ranges.
+
+    initial() makes an empty accumulator, fold(acc, row) adds one UserRow to
+    it and combine(a, b) merges two partials. With processes=True the
+    callables must be picklable (module-level functions), and each worker
+    process opens its own pool.
+    """
+    parts = parts or os.cpu_count() or 1
+    ranges = key_ranges(parts)
+    if processes:
+        executor = ProcessPoolExecutor(max_workers=workers or len(ranges))
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers or _default_workers(parts))
+    with executor:
+        partials = executor.map(
+            _reduce_range,
+            ranges,
+            [filters] * len(ranges),
+            [initial] * len(ranges),
+            [fold] * len(ranges),
+            [fetch_size] * len(ranges),
+        )
+        return reduce(combine, partials, initial())
+
+
+def _fold_age(stats, row):
+    # truncated like stream_user_ages(), so both averages agree
+    return stats.add(int(row.age))
+
+
+def _merge_stats(left, right):
+    return left.merge(right)
+
+
+def average_age(parts=None, processes=False):
+    """Average age of users via parallel_reduce over RunningStats partials"""
+    stats = parallel_reduce(
+        RunningStats, _fold_age, _merge_stats, parts=parts, processes=processes
+    )
+    return stats.mean
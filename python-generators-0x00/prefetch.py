@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Background prefetching for page/batch generators.
+
+prefetched(iterable, depth) pulls items from `iterable` on a worker thread
+into a bounded queue, so the next `depth` pages are fetched from MySQL while
+the consumer is still busy with the current one.
+interleaved(iterables, depth, workers) does the same for several sources at
+once, yielding items in whatever order the workers produce them.
+- errors raised by a source are re-raised in the consumer
+- closing the wrapper (or abandoning it) stops the workers and closes the
+  source generators, which returns their pooled connections
+"""
+
+import queue
+import threading
+
+_ITEM, _DONE, _ERROR = range(3)
+# how often a blocked worker re-checks whether the consumer went away
+_POLL_SECONDS = 0.1
+
+
+def _drain_in_background(sources, depth, workers):
+    """Run every source on `workers` threads, yielding their items as they come"""
+    if depth < 1:
+        raise ValueError("depth must be at least 1")
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    pending = iter(sources)
+    pending_lock = threading.Lock()
+
+    def put(message):
+        while not stop.is_set():
+            try:
+                items.put(message, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def next_source():
+        with pending_lock:
+            return next(pending, None)
+
+    def produce():
+        try:
+            while not stop.is_set():
+                iterable = next_source()
+                if iterable is None:
+                    break
+                source = iter(iterable)
+                try:
+                    for item in source:
+                        if not put((_ITEM, item)):
+                            return
+                finally:
+                    # the source generator belongs to this thread; close it here
+                    close = getattr(source, "close", None)
+                    if close is not None:
+                        close()
+        except BaseException as err:
+            put((_ERROR, err))
+        finally:
+            put((_DONE, None))
+
+    threads = [
+        threading.Thread(target=produce, name="prefetch", daemon=True)
+        for _ in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    running = len(threads)
+    try:
+        while running:
+            kind, payload = items.get()
+            if kind == _DONE:
+                running -= 1
+            elif kind == _ERROR:
+                raise payload
+            else:
+                yield payload
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def prefetched(iterable, depth=2):
+    """Yield items of `iterable`, fetching up to `depth` ahead in the background"""
+    return _drain_in_background([iterable], depth, 1)
+
+
+def interleaved(iterables, depth=2, workers=4):
+    """Yield items of all `iterables`, each drained by one of `workers` threads"""
+    return _drain_in_background(iterables, depth, workers)
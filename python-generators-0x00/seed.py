@@ -3,18 +3,44 @@
 Seed + DB utilities for the Python Generators project.
 
 Env vars supported (with sensible defaults for local dev):
+  USER_DATA_BACKEND=mysql|sqlite, USER_DATA_SQLITE (see sqlite_backend.py)
   MYSQL_HOST, MYSQL_PORT, MYSQL_USER, MYSQL_PASSWORD
+  MYSQL_POOL_SIZE, MYSQL_POOL_MAX_IDLE, MYSQL_POOL_TIMEOUT,
+  MYSQL_POOL_VALIDATE_AFTER (shared pool)
+  MYSQL_LOCAL_INFILE=1 (allow the LOAD DATA LOCAL INFILE seed fast path)
 CSV file expected to have headers: user_id,name,email,age
+
+Parallel seeding from the command line:
+  ./seed.py user_data.csv [workers] [chunk_size]
 """
 
+import contextlib
 import csv
+import hashlib
 import os
+import sys
+import threading
+import time
 import uuid
-import mysql.connector
-from mysql.connector import errorcode
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from itertools import islice
+
+try:
+    import mysql.connector
+    from mysql.connector import errorcode
+except ImportError:  # only the sqlite backend is usable without it
+    mysql = None
+    errorcode = None
 
 DB_NAME = "ALX_prodev"
 TABLE_NAME = "user_data"
+PROGRESS_TABLE = "seed_progress"
+CSV_COLUMNS = ("user_id", "name", "email", "age")
+# compact, immutable user_data row: no per-row dict, attribute or index access
+UserRow = namedtuple("UserRow", CSV_COLUMNS)
+DEFAULT_CHUNK_SIZE = 5000
 
 def _mysql_config(include_db: bool = False):
     cfg = {
@@ -25,6 +51,8 @@ def _mysql_config(include_db: bool = False):
     }
     if include_db:
         cfg["database"] = DB_NAME
+    if os.environ.get("MYSQL_LOCAL_INFILE") == "1":
+        cfg["allow_local_infile"] = True
     return cfg
 
 def connect_db():
@@ -60,8 +88,339 @@ def connect_to_prodev():
         print(f"Error connecting to {DB_NAME}: {err}")
         return None
 
+class MySQLBackend:
+    """The default backend: mysql.connector against ALX_prodev."""
+
+    name = "mysql"
+    table_options = "ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+    begin_snapshot_sql = "START TRANSACTION WITH CONSISTENT SNAPSHOT"
+    # timestamp `%s` seconds ago, for change scans that skip in-flight rows
+    settled_before_sql = "NOW(6) - INTERVAL %s SECOND"
+
+    def __init__(self):
+        if mysql is None:
+            raise ImportError(
+                "the mysql backend needs mysql-connector-python; "
+                "install it or set USER_DATA_BACKEND=sqlite"
+            )
+        self.Error = mysql.connector.Error
+
+    @property
+    def upsert_sql(self):
+        return UPSERT_SQL
+
+    def connect(self):
+        return connect_to_prodev()
+
+    def create_table(self, connection):
+        _create_mysql_table(connection)
+        _add_change_tracking(connection)
+
+    @staticmethod
+    def byte_length(column):
+        return f"LENGTH({column})"
+
+    @staticmethod
+    def as_int(column):
+        """DECIMAL truncated server-side, so the driver decodes a plain integer"""
+        return f"CAST(TRUNCATE({column}, 0) AS SIGNED)"
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """Backend named by USER_DATA_BACKEND (default mysql), created once"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = os.environ.get("USER_DATA_BACKEND", "mysql").lower()
+            if name == "sqlite":
+                from sqlite_backend import SQLiteBackend
+                _backend = SQLiteBackend()
+            elif name == "mysql":
+                _backend = MySQLBackend()
+            else:
+                raise ValueError(f"Unknown USER_DATA_BACKEND: {name!r}")
+        return _backend
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of ALX_prodev connections.
+
+    - at most max_size connections are checked out at once; acquire() waits
+      up to `timeout` seconds for a free slot, then raises TimeoutError
+    - idle connections older than max_idle seconds are closed, not reused
+    - connections idle for longer than validate_after seconds are pinged
+      before reuse and replaced if the ping fails
+    - released connections are rolled back only when a transaction is open
+    """
+
+    def __init__(self, max_size=8, max_idle=300.0, timeout=10.0, connect=None,
+                 validate_after=30.0):
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.validate_after = validate_after
+        self._connect = connect or get_backend().connect
+        self._idle = deque()  # (connection, released_at), most recent on the right
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._in_use = 0
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "failed_checks": 0,
+            "timeouts": 0,
+        }
+
+    def _count(self, key):
+        with self._lock:
+            self._counters[key] += 1
+
+    @staticmethod
+    def _healthy(conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _take_idle(self):
+        """Pop the freshest reusable idle connection, evicting stale ones"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, released_at = self._idle.pop()
+            idle_for = time.monotonic() - released_at
+            if idle_for > self.max_idle:
+                self._count("evictions")
+                self._discard(conn)
+                continue
+            # a connection released moments ago is almost never dead, and a
+            # ping costs a full round trip on every checkout
+            if idle_for > self.validate_after and not self._healthy(conn):
+                self._count("failed_checks")
+                self._discard(conn)
+                continue
+            return conn
+
+    def acquire(self):
+        """Check out a connection, reusing an idle one when possible"""
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count("timeouts")
+            raise TimeoutError(
+                f"No pooled connection available within {self.timeout}s"
+            )
+        try:
+            conn = self._take_idle()
+            if conn is not None:
+                self._count("hits")
+            else:
+                self._count("misses")
+                conn = self._connect()
+                if conn is None:
+                    raise ConnectionError(f"Could not connect to {DB_NAME}")
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool (or close it when discard=True)"""
+        if getattr(conn, "unread_result", False):
+            # an unbuffered result was abandoned mid-stream; draining it could
+            # mean reading the rest of the table, so drop the socket instead
+            discard = True
+        if not discard and getattr(conn, "in_transaction", True):
+            try:
+                # end any open read snapshot so the next borrower sees fresh data
+                conn.rollback()
+            except Exception:
+                discard = True
+        if discard:
+            self._discard(conn)
+        else:
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        with self._lock:
+            self._in_use -= 1
+        self._slots.release()
+
+    @contextlib.contextmanager
+    def connection(self):
+        """with pool.connection() as conn: ... (returned to the pool on exit)"""
+        conn = self.acquire()
+        try:
+            yield conn
+        except GeneratorExit:
+            # a streaming generator was abandoned early; release() still
+            # discards the connection if it has unread results pending
+            self.release(conn)
+            raise
+        except BaseException:
+            self.release(conn, discard=True)
+            raise
+        else:
+            self.release(conn)
+
+    def stats(self):
+        """Snapshot of hit/miss/eviction counters and current occupancy"""
+        with self._lock:
+            snapshot = dict(self._counters)
+            snapshot["idle"] = len(self._idle)
+            snapshot["in_use"] = self._in_use
+        snapshot["max_size"] = self.max_size
+        return snapshot
+
+    def close(self):
+        """Close every idle connection (checked-out ones close on release)"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Shared process-wide pool, created on first use from MYSQL_POOL_* env vars"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        # a forked worker must not reuse the parent's sockets; it leaves them
+        # alone (closing would end the parent's sessions) and opens its own
+        if _pool is None or _pool_pid != os.getpid():
+            _pool_pid = os.getpid()
+            _pool = ConnectionPool(
+                max_size=int(os.environ.get("MYSQL_POOL_SIZE", "8")),
+                max_idle=float(os.environ.get("MYSQL_POOL_MAX_IDLE", "300")),
+                timeout=float(os.environ.get("MYSQL_POOL_TIMEOUT", "10")),
+                validate_after=float(os.environ.get("MYSQL_POOL_VALIDATE_AFTER", "30")),
+            )
+        return _pool
+
+def pooled_connection():
+    """Borrow a connection from the shared pool: with pooled_connection() as conn"""
+    return get_pool().connection()
+
+def pool_stats():
+    """Counters of the shared pool, for sizing MYSQL_POOL_SIZE"""
+    return get_pool().stats()
+
+# change tracking for incremental scans (see changes.py): updated_at moves and
+# version bumps only when an upsert really changes a row
+TRACKING_COLUMNS = {
+    "updated_at": "updated_at TIMESTAMP(6) NOT NULL "
+                  "DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)",
+    "version": "version INT UNSIGNED NOT NULL DEFAULT 1",
+    # MD5 of name/email/age (see row_hash), used to skip unchanged upserts
+    "content_hash": "content_hash BINARY(16) NULL",
+}
+CHANGES_INDEX = "idx_user_data_changes"
+
+# loads in flight (see tracked_load); a lease older than LOAD_LEASE_SECONDS
+# belongs to a loader that died without removing it and is ignored
+LOADS_TABLE = "user_data_loads"
+LOAD_LEASE_SECONDS = float(os.environ.get("USER_DATA_LOAD_LEASE", "3600"))
+# one row counting the loader commits that wrote user_data (see bump_generation)
+GENERATION_TABLE = "user_data_generation"
+
 def create_table(connection):
     """creates a table user_data if it does not exists with the required fields"""
+    get_backend().create_table(connection)
+    create_load_tables(connection)
+    print("Table user_data created successfully")
+
+def create_load_tables(connection):
+    """Create user_data_loads and the user_data_generation counter row"""
+    backend = get_backend()
+    cur = connection.cursor()
+    try:
+        cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {LOADS_TABLE} (
+            load_id CHAR(36) PRIMARY KEY,
+            started_at TIMESTAMP(6) NOT NULL
+        ) {backend.table_options};
+        """)
+        cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {GENERATION_TABLE} (
+            id INT PRIMARY KEY,
+            generation BIGINT NOT NULL
+        ) {backend.table_options};
+        """)
+        cur.execute(f"SELECT COUNT(*) FROM {GENERATION_TABLE}")
+        if not cur.fetchone()[0]:
+            try:
+                cur.execute(
+                    f"INSERT INTO {GENERATION_TABLE} (id, generation) VALUES (1, 0)"
+                )
+            except backend.Error:
+                connection.rollback()  # another process created it first
+        connection.commit()
+    finally:
+        cur.close()
+
+def bump_generation(cur):
+    """
+    Count one more write to user_data, in the writer's own transaction
+    after its rows are written: the row lock is held only until the commit,
+    and a reader sees the new generation exactly when it sees the new rows.
+    """
+    cur.execute(
+        f"UPDATE {GENERATION_TABLE} SET generation = generation + 1 WHERE id = 1"
+    )
+
+@contextlib.contextmanager
+def tracked_load(connection):
+    """
+    Hold a lease in user_data_loads while a loader writes user_data.
+
+    updated_at is stamped when a statement starts, not when it commits, so
+    a long load can commit rows dated before a watermark a change scan has
+    already passed; changes.py holds its watermark below the oldest lease.
+    The lease is committed on its own before the load and removed after
+    it; a failed load is rolled back first so none of it is committed.
+    """
+    create_load_tables(connection)
+    load_id = str(uuid.uuid4())
+    cur = connection.cursor()
+    try:
+        cur.execute(
+            f"INSERT INTO {LOADS_TABLE} (load_id, started_at) "
+            f"VALUES (%s, {get_backend().settled_before_sql})",
+            (load_id, 0),
+        )
+        connection.commit()
+    finally:
+        cur.close()
+    try:
+        yield load_id
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        cur = connection.cursor()
+        try:
+            cur.execute(f"DELETE FROM {LOADS_TABLE} WHERE load_id = %s", (load_id,))
+            connection.commit()
+        except get_backend().Error:
+            pass  # left for LOAD_LEASE_SECONDS to expire
+        finally:
+            cur.close()
+
+def _create_mysql_table(connection):
     # age is DECIMAL per spec; use DECIMAL(5,2) to be flexible
     DDL = f"""
     CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
@@ -69,44 +428,504 @@ def create_table(connection):
         name VARCHAR(255) NOT NULL,
         email VARCHAR(255) NOT NULL,
         age DECIMAL(5,2) NOT NULL,
+        {TRACKING_COLUMNS["updated_at"]},
+        {TRACKING_COLUMNS["version"]},
+        {TRACKING_COLUMNS["content_hash"]},
         INDEX (user_id),
-        INDEX (email)
+        INDEX (email),
+        INDEX {CHANGES_INDEX} (updated_at, user_id)
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
     """
     cur = connection.cursor()
     try:
         cur.execute(DDL)
         connection.commit()
-        print("Table user_data created successfully")
     finally:
         cur.close()
 
-def insert_data(connection, csv_path: str):
-    """inserts data in the database if it does not exist (idempotent by user_id)"""
+def _add_change_tracking(connection):
+    """Migrate a user_data table created before change tracking existed"""
+    cur = connection.cursor()
+    try:
+        cur.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s",
+            (TABLE_NAME,),
+        )
+        existing = {row[0].lower() for row in cur.fetchall()}
+        missing = [name for name in TRACKING_COLUMNS if name not in existing]
+        if not missing:
+            return
+        changes = [f"ADD COLUMN {TRACKING_COLUMNS[name]}" for name in missing]
+        if "updated_at" in missing:
+            changes.append(f"ADD INDEX {CHANGES_INDEX} (updated_at, user_id)")
+        cur.execute(f"ALTER TABLE {TABLE_NAME} {', '.join(changes)}")
+        connection.commit()
+    finally:
+        cur.close()
+
+FILTER_OPS = {
+    "=": "= %s",
+    "!=": "<> %s",
+    "<": "< %s",
+    "<=": "<= %s",
+    ">": "> %s",
+    ">=": ">= %s",
+    "like": "LIKE %s",
+    "between": "BETWEEN %s AND %s",
+}
+
+def build_select(columns=None, filters=None, table=TABLE_NAME):
+    """
+    Compile a projection and filters into one parameterized SELECT.
+
+    columns: names from CSV_COLUMNS (default: all of them)
+    filters: (column, op, value) tuples ANDed into the WHERE clause, with op
+      one of FILTER_OPS or "in"; anything else, e.g. a callable(row) -> bool,
+      cannot be pushed down and is returned for the caller to apply in Python,
+      called with each row as a {column: value} dict.
+    Returns (sql, params, python_predicates).
+    """
+    columns = list(columns or CSV_COLUMNS)
+    for col in columns:
+        if col not in CSV_COLUMNS:
+            raise ValueError(f"Unknown column: {col!r}")
+    clauses, params, python_predicates = [], [], []
+    for flt in filters or ():
+        if callable(flt):
+            python_predicates.append(flt)
+            continue
+        col, op, value = flt
+        op = op.lower()
+        if col not in CSV_COLUMNS:
+            raise ValueError(f"Unknown column: {col!r}")
+        if op == "in":
+            values = list(value)
+            if not values:
+                clauses.append("1 = 0")
+                continue
+            clauses.append(f"{col} IN ({', '.join(['%s'] * len(values))})")
+            params.extend(values)
+        elif op in FILTER_OPS:
+            clauses.append(f"{col} {FILTER_OPS[op]}")
+            params.extend(value if op == "between" else (value,))
+        else:
+            raise ValueError(f"Unsupported filter operator: {op!r}")
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    return sql, tuple(params), python_predicates
+
+# ON DUPLICATE KEY UPDATE assigns left to right, so `version` compares the
+# stored values before they are overwritten; unchanged rows stay untouched
+UPSERT_SQL = f"""
+    INSERT INTO {TABLE_NAME} (user_id, name, email, age, content_hash)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+      version = IF(name <=> VALUES(name) AND email <=> VALUES(email)
+                   AND age <=> VALUES(age), version, version + 1),
+      name = VALUES(name),
+      email = VALUES(email),
+      age = VALUES(age),
+      content_hash = VALUES(content_hash)
+"""
+HASH_SEPARATOR = "\x1f"
+
+def row_hash(name, email, age):
+    """
+    16-byte MD5 of the content columns, normalized the way MySQL stores them
+    (age as DECIMAL(5,2) text, ties rounded away from zero as CAST does), so
+    equal rows hash equal on both sides.
+    """
+    try:
+        age = str(Decimal(str(age).strip()).quantize(Decimal("0.01"), ROUND_HALF_UP))
+    except (InvalidOperation, TypeError, ValueError):
+        age = str(age)
+    content = HASH_SEPARATOR.join((name, email, age))
+    return hashlib.md5(content.encode("utf-8")).digest()
+
+def _trim(value):
+    # MySQL TRIM(), as the LOAD DATA path applies it, strips spaces only
+    return (value or "").strip(" ")
+
+def _csv_row(row):
+    """Map one csv.DictReader row to an (user_id, name, email, age, hash) tuple"""
+    uid = row.get("user_id") or str(uuid.uuid4())
+    name = _trim(row.get("name"))
+    email = _trim(row.get("email"))
+    age = row.get("age")
+    return (uid, name, email, age, row_hash(name, email, age))
+
+def _create_progress_table(connection):
+    cur = connection.cursor()
+    try:
+        cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE} (
+            source VARCHAR(512) PRIMARY KEY,
+            rows_committed BIGINT NOT NULL
+        ) {get_backend().table_options};
+        """)
+        connection.commit()
+    finally:
+        cur.close()
+
+def _committed_rows(connection, source):
+    """Rows of `source` already committed by an earlier chunked load"""
+    cur = connection.cursor()
+    try:
+        cur.execute(
+            f"SELECT rows_committed FROM {PROGRESS_TABLE} WHERE source = %s",
+            (source,),
+        )
+        row = cur.fetchone()
+        return int(row[0]) if row else 0
+    finally:
+        cur.close()
+
+def _record_progress(cur, source, rows_committed):
+    # runs inside the chunk's transaction, so data and checkpoint commit together
+    cur.execute(
+        f"REPLACE INTO {PROGRESS_TABLE} (source, rows_committed) VALUES (%s, %s)",
+        (source, rows_committed),
+    )
+
+def _insert_chunk(connection, cur, chunk):
+    """
+    Upsert one chunk in the current transaction.
+    If the batch fails, roll back and retry row by row so one bad row only
+    costs itself; returns the number of rejected rows.
+    """
+    backend = get_backend()
+    try:
+        cur.executemany(backend.upsert_sql, chunk)
+        return 0
+    except backend.Error:
+        connection.rollback()
+    rejected = 0
+    for values in chunk:
+        try:
+            cur.execute(backend.upsert_sql, values)
+        except backend.Error as err:
+            rejected += 1
+            print(f"Skipping row {values[0]}: {err}")
+    return rejected
+
+def _changed_rows(cur, chunk):
+    """
+    Compare a chunk with the stored content hashes in one primary-key lookup.
+    Returns (rows to write, new count, changed count); the rest are unchanged.
+    """
+    placeholders = ", ".join(["%s"] * len(chunk))
+    cur.execute(
+        f"SELECT user_id, content_hash FROM {TABLE_NAME} "
+        f"WHERE user_id IN ({placeholders})",
+        [values[0] for values in chunk],
+    )
+    stored = {uid: bytes(h) if h is not None else None for uid, h in cur.fetchall()}
+    to_write, new, changed = [], 0, 0
+    for values in chunk:
+        if values[0] not in stored:
+            new += 1
+        elif stored[values[0]] != values[4]:
+            changed += 1
+        else:
+            continue
+        to_write.append(values)
+    return to_write, new, changed
+
+def _write_chunk(connection, cur, chunk, counts, skip_unchanged=True):
+    """Upsert a chunk (only its new/changed rows by default), tallying counts"""
+    if skip_unchanged:
+        to_write, new, changed = _changed_rows(cur, chunk)
+        counts["new"] += new
+        counts["changed"] += changed
+        counts["unchanged"] += len(chunk) - len(to_write)
+    else:
+        to_write = chunk
+    if to_write:
+        counts["rejected"] += _insert_chunk(connection, cur, to_write)
+        bump_generation(cur)
+    counts["rows"] += len(chunk)
+
+def _new_counts():
+    return {"rows": 0, "new": 0, "changed": 0, "unchanged": 0, "rejected": 0}
+
+# LOAD DATA goes into this per-session table first: REPLACE INTO user_data
+# would delete and re-insert every row, resetting version and moving
+# updated_at, so change scans would see the whole table as changed
+LOAD_STAGING_TABLE = f"{TABLE_NAME}_load"
+LOAD_UPSERT_SQL = f"""
+    INSERT INTO {TABLE_NAME} (user_id, name, email, age, content_hash)
+    SELECT user_id, name, email, age, content_hash FROM {LOAD_STAGING_TABLE}
+    ON DUPLICATE KEY UPDATE
+      version = IF({TABLE_NAME}.name <=> VALUES(name)
+                   AND {TABLE_NAME}.email <=> VALUES(email)
+                   AND {TABLE_NAME}.age <=> VALUES(age), version, version + 1),
+      name = VALUES(name),
+      email = VALUES(email),
+      age = VALUES(age),
+      content_hash = VALUES(content_hash)
+"""
+
+def load_data_infile(connection, csv_path: str):
+    """
+    Fast path: let the server parse the CSV with LOAD DATA LOCAL INFILE.
+    Needs local_infile=ON on the server and MYSQL_LOCAL_INFILE=1 here.
+    Rows without a user_id get a server-side UUID(). The file is loaded into
+    a temporary staging table and upserted from there like UPSERT_SQL does,
+    so unchanged rows keep their version and updated_at; returns the number
+    of rows loaded.
+    """
+    if get_backend().name != "mysql":
+        raise ValueError("LOAD DATA LOCAL INFILE needs the mysql backend")
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f), [])
+    targets = [f"@{col}" if col in CSV_COLUMNS else "@skip" for col in header]
+    assignments = [
+        "user_id = COALESCE(NULLIF(@user_id, ''), UUID())"
+        if "user_id" in header else "user_id = UUID()",
+    ]
+    for col in ("name", "email"):
+        if col in header:
+            assignments.append(f"{col} = TRIM(COALESCE(@{col}, ''))")
+        else:
+            assignments.append(f"{col} = ''")
+    assignments.append("age = @age" if "age" in header else "age = 0")
+    # same normalization as row_hash(), so later diff-aware loads line up
+    assignments.append(
+        "content_hash = UNHEX(MD5(CONCAT_WS(CHAR(31), "
+        + ", ".join(
+            f"TRIM(COALESCE(@{col}, ''))" if col in header else "''"
+            for col in ("name", "email")
+        )
+        + (", CAST(@age AS DECIMAL(5,2))" if "age" in header else ", '0.00'")
+        + ")))"
+    )
+    sql = f"""
+        LOAD DATA LOCAL INFILE %s
+        REPLACE INTO TABLE {LOAD_STAGING_TABLE}
+        CHARACTER SET utf8mb4
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+        LINES TERMINATED BY '\\n'
+        IGNORE 1 LINES
+        ({", ".join(targets)})
+        SET {", ".join(assignments)}
+    """
+    with tracked_load(connection):
+        cur = connection.cursor()
+        try:
+            cur.execute(f"DROP TEMPORARY TABLE IF EXISTS {LOAD_STAGING_TABLE}")
+            cur.execute(f"""
+            CREATE TEMPORARY TABLE {LOAD_STAGING_TABLE} (
+                user_id CHAR(36) PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                email VARCHAR(255) NOT NULL,
+                age DECIMAL(5,2) NOT NULL,
+                content_hash BINARY(16) NULL
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """)
+            # REPLACE here only settles duplicate user_ids within the file
+            cur.execute(sql, (os.path.abspath(csv_path),))
+            cur.execute(f"SELECT COUNT(*) FROM {LOAD_STAGING_TABLE}")
+            loaded = int(cur.fetchone()[0])
+            cur.execute(LOAD_UPSERT_SQL)
+            if cur.rowcount:
+                bump_generation(cur)
+            connection.commit()
+            return loaded
+        finally:
+            try:
+                cur.execute(f"DROP TEMPORARY TABLE IF EXISTS {LOAD_STAGING_TABLE}")
+            except mysql.connector.Error:
+                pass  # the table goes away with the session anyway
+            cur.close()
+
+def insert_data(connection, csv_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                resume: bool = False, progress=None, local_infile: bool = False,
+                skip_unchanged: bool = True):
+    """
+    inserts data in the database if it does not exist (idempotent by user_id)
+
+    The CSV is streamed in chunks of `chunk_size` rows; each chunk commits
+    together with a checkpoint in seed_progress, so memory stays bounded and
+    resume=True continues after the last committed chunk of the same file.
+    With skip_unchanged, each chunk's content hashes are compared with the
+    stored ones first and only new or changed rows are sent to the server.
+    progress(rows_done) is called after every commit.
+    local_infile=True hands the whole file to load_data_infile() instead.
+    Returns counts of rows, new, changed, unchanged and rejected rows.
+    """
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV not found: {csv_path}")
+    if local_infile:
+        return {"rows": load_data_infile(connection, csv_path)}
 
+    source = os.path.abspath(csv_path)
+    _create_progress_table(connection)
+    done = _committed_rows(connection, source) if resume else 0
+    counts = _new_counts()
+
+    with tracked_load(connection):
+        cur = connection.cursor()
+        try:
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                # rows before the checkpoint were committed by an earlier run
+                for _ in islice(reader, done):
+                    pass
+                while True:
+                    chunk = [_csv_row(row) for row in islice(reader, chunk_size)]
+                    if not chunk:
+                        break
+                    rejected = counts["rejected"]
+                    _write_chunk(connection, cur, chunk, counts, skip_unchanged)
+                    done += len(chunk)
+                    _record_progress(cur, source, done)
+                    connection.commit()
+                    if counts["rejected"] > rejected:
+                        print(
+                            f"Rejected {counts['rejected'] - rejected} row(s) "
+                            f"in chunk ending at row {done}"
+                        )
+                    if progress:
+                        progress(done)
+            if skip_unchanged:
+                print(
+                    f"Rows: {counts['new']} new, {counts['changed']} changed, "
+                    f"{counts['unchanged']} unchanged"
+                )
+            return counts
+        finally:
+            cur.close()
+
+def table_row_count(connection):
+    """SELECT COUNT(*) FROM user_data"""
     cur = connection.cursor()
     try:
-        sql = f"""
-            INSERT INTO {TABLE_NAME} (user_id, name, email, age)
-            VALUES (%s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-              name = VALUES(name),
-              email = VALUES(email),
-              age = VALUES(age)
-        """
-        to_insert = []
-        with open(csv_path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                uid = row.get("user_id") or str(uuid.uuid4())
-                name = row.get("name", "").strip()
-                email = row.get("email", "").strip()
-                age = row.get("age")
-                to_insert.append((uid, name, email, age))
-        if to_insert:
-            cur.executemany(sql, to_insert)
-            connection.commit()
+        cur.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}")
+        return int(cur.fetchone()[0])
     finally:
         cur.close()
+
+def _byte_ranges(csv_path: str, parts: int):
+    """
+    Split the CSV body into `parts` (start, end) byte ranges on line breaks.
+    Assumes no quoted field spans lines, which holds for the seed files.
+    Returns (header, ranges).
+    """
+    size = os.path.getsize(csv_path)
+    with open(csv_path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]), [])
+        body_start = f.tell()
+        bounds = [body_start]
+        for i in range(1, parts):
+            target = body_start + (size - body_start) * i // parts
+            if target <= bounds[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()  # move to the start of the next full line
+            if f.tell() > bounds[-1] and f.tell() < size:
+                bounds.append(f.tell())
+        bounds.append(size)
+    return header, list(zip(bounds, bounds[1:]))
+
+def _seed_range(csv_path: str, header, start: int, end: int, chunk_size: int):
+    """Worker: parse and upsert the lines in [start, end) on one pooled connection"""
+    def lines():
+        with open(csv_path, "rb") as f:
+            f.seek(start)
+            while f.tell() < end:
+                line = f.readline()
+                if not line:
+                    break
+                yield line.decode("utf-8")
+
+    rows = (dict(zip(header, fields)) for fields in csv.reader(lines()) if fields)
+    counts = _new_counts()
+    with pooled_connection() as conn:
+        with tracked_load(conn):
+            cur = conn.cursor()
+            try:
+                while True:
+                    chunk = [_csv_row(row) for row in islice(rows, chunk_size)]
+                    if not chunk:
+                        break
+                    _write_chunk(conn, cur, chunk, counts)
+                    conn.commit()
+            finally:
+                cur.close()
+    return counts
+
+def seed_parallel(csv_path: str, workers: int = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Seed user_data from a large CSV using a process pool.
+
+    The file is split into byte ranges and each worker process parses and
+    upserts its own range on its own connection. Prints rows/sec and a
+    row-count reconciliation against user_data, and returns them as a dict.
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+    workers = workers or os.cpu_count() or 1
+
+    with pooled_connection() as conn:
+        create_table(conn)
+        before = table_row_count(conn)
+
+    header, ranges = _byte_ranges(csv_path, workers)
+    started = time.perf_counter()
+    counts = _new_counts()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_seed_range, csv_path, header, start, end, chunk_size)
+            for start, end in ranges
+        ]
+        for future in futures:
+            for key, value in future.result().items():
+                counts[key] += value
+    elapsed = time.perf_counter() - started
+    rejected = counts["rejected"]
+    accepted = counts["rows"] - rejected
+
+    with pooled_connection() as conn:
+        after = table_row_count(conn)
+    added = after - before
+    # without a user_id column every accepted row is a fresh UUID, so the
+    # table must grow by exactly that much; with ids, re-seeded rows upsert
+    if "user_id" in header:
+        reconciled = added <= accepted
+    else:
+        reconciled = added == accepted
+    report = {
+        "workers": len(ranges),
+        "rows_accepted": accepted,
+        "rows_rejected": rejected,
+        "rows_new": counts["new"],
+        "rows_changed": counts["changed"],
+        "rows_unchanged": counts["unchanged"],
+        "seconds": elapsed,
+        "rows_per_sec": accepted / elapsed if elapsed else 0.0,
+        "table_rows_before": before,
+        "table_rows_after": after,
+        "reconciled": reconciled,
+    }
+    print(
+        f"Seeded {accepted} rows ({rejected} rejected) with {len(ranges)} "
+        f"workers in {elapsed:.2f}s: {report['rows_per_sec']:,.0f} rows/sec"
+    )
+    print(
+        f"{TABLE_NAME}: {before} -> {after} rows (+{added}); "
+        f"reconciliation {'OK' if reconciled else 'MISMATCH'}"
+    )
+    print(
+        f"Rows: {counts['new']} new, {counts['changed']} changed, "
+        f"{counts['unchanged']} unchanged"
+    )
+    return report
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"usage: {sys.argv[0]} <csv_path> [workers] [chunk_size]")
+        sys.exit(1)
+    seed_parallel(sys.argv[1], *(int(a) for a in sys.argv[2:4]))
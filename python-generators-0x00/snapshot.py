@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Local memory-mapped snapshot of user_data for repeated scans.
+
+dump_snapshot() copies the table once into a compact fixed-width binary
+file; open_snapshot() maps it back and re-dumps first if the table changed
+since. Scans then read straight from the page cache: no MySQL round trips
+and no Decimal decoding.
+
+The change check reads user_data_generation, which every seed loader bumps
+in the same transaction as its writes (seed.bump_generation), so a commit
+is noticed whatever timestamps its rows carry, plus the newest updated_at
+off the (updated_at, user_id) index for writes made outside the loaders.
+Those outside writes are only noticed when they move MAX(updated_at): one
+that commits after a later-stamped write can go unseen. Within
+recheck_after seconds of a passed check (USER_DATA_SNAPSHOT_RECHECK,
+default 0) the same snapshot is reused without asking the database again.
+
+File layout (little-endian), one contiguous column after another:
+  header (HEADER_SIZE bytes): magic, rows, name/email widths, fingerprint
+  user_id  rows x 36 bytes
+  name     rows x name_width bytes, NUL padded UTF-8
+  email    rows x email_width bytes, NUL padded UTF-8
+  age      rows x int32, hundredths (DECIMAL(5,2) scaled to an integer)
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from decimal import Decimal
+
+from seed import (
+    GENERATION_TABLE, TABLE_NAME, UserRow, create_load_tables, get_backend,
+    pooled_connection,
+)
+
+MAGIC = b"UDSNAP01"
+HEADER = struct.Struct("<8sQHH64s")
+HEADER_SIZE = 128
+ID_WIDTH = 36
+AGE = struct.Struct("<i")
+DEFAULT_PATH = os.environ.get("USER_DATA_SNAPSHOT", "user_data.snap")
+RECHECK_AFTER = float(os.environ.get("USER_DATA_SNAPSHOT_RECHECK", "0"))
+
+_checked = {}  # path -> (fingerprint, monotonic time of the last passed check)
+_checked_lock = threading.Lock()
+
+
+def _fingerprint(cur):
+    """
+    Change signature: the loaders' commit generation plus the newest
+    updated_at (an index probe). No row count, which would be a full scan.
+    """
+    cur.execute(
+        f"SELECT (SELECT generation FROM {GENERATION_TABLE} WHERE id = 1), "
+        f"MAX(updated_at) FROM {TABLE_NAME}"
+    )
+    generation, latest = cur.fetchone()
+    return f"{generation}|{latest}"
+
+
+def table_fingerprint():
+    """Current change signature, or None if load tracking is not set up yet"""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            return _fingerprint(cur)
+        except get_backend().Error:
+            return None  # dump_snapshot() creates the tables
+        finally:
+            cur.close()
+
+
+def _put(mm, offset, width, value):
+    mm[offset:offset + width] = value.ljust(width, b"\0")
+
+
+def dump_snapshot(path=DEFAULT_PATH):
+    """Write user_data to `path` atomically; returns the number of rows"""
+    tmp_path = f"{path}.tmp"
+    backend = get_backend()
+    with pooled_connection() as conn:
+        create_load_tables(conn)
+        cur = conn.cursor()
+        try:
+            # one consistent read view for the fingerprint, widths and rows
+            cur.execute(backend.begin_snapshot_sql)
+            fingerprint = _fingerprint(cur)
+            cur.execute(
+                f"SELECT COUNT(*), "
+                f"COALESCE(MAX({backend.byte_length('name')}), 0), "
+                f"COALESCE(MAX({backend.byte_length('email')}), 0) FROM {TABLE_NAME}"
+            )
+            rows, name_width, email_width = (int(v) for v in cur.fetchone())
+            name_width, email_width = max(name_width, 1), max(email_width, 1)
+            names_at = HEADER_SIZE + rows * ID_WIDTH
+            emails_at = names_at + rows * name_width
+            ages_at = emails_at + rows * email_width
+            size = ages_at + rows * AGE.size
+
+            with open(tmp_path, "w+b") as f:
+                f.truncate(size)
+                with mmap.mmap(f.fileno(), size) as mm:
+                    HEADER.pack_into(
+                        mm, 0, MAGIC, rows, name_width, email_width,
+                        fingerprint.encode("utf-8"),
+                    )
+                    stream = conn.cursor(buffered=False)
+                    try:
+                        stream.execute(
+                            f"SELECT user_id, name, email, age FROM {TABLE_NAME} "
+                            "ORDER BY user_id"
+                        )
+                        for i, (user_id, name, email, age) in enumerate(stream):
+                            if i == rows:
+                                break
+                            _put(mm, HEADER_SIZE + i * ID_WIDTH, ID_WIDTH,
+                                 user_id.encode("ascii"))
+                            _put(mm, names_at + i * name_width, name_width,
+                                 name.encode("utf-8"))
+                            _put(mm, emails_at + i * email_width, email_width,
+                                 email.encode("utf-8"))
+                            AGE.pack_into(mm, ages_at + i * AGE.size,
+                                          int(Decimal(str(age)) * 100))
+                    finally:
+                        try:
+                            stream.close()
+                        except Exception:
+                            pass
+                    mm.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            return rows
+        finally:
+            cur.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class Snapshot:
+    """Read-only mapped view of a snapshot file; use as a context manager."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, rows, name_width, email_width, fingerprint = HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"Not a user_data snapshot: {path}")
+        self.rows = rows
+        self.fingerprint = fingerprint.rstrip(b"\0").decode("utf-8")
+        self._name_width = name_width
+        self._email_width = email_width
+        self._names_at = HEADER_SIZE + rows * ID_WIDTH
+        self._emails_at = self._names_at + rows * name_width
+        self._ages_at = self._emails_at + rows * email_width
+
+    def __len__(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def close(self):
+        self._mm.close()
+
+    def _age(self, i):
+        return int(AGE.unpack_from(self._mm, self._ages_at + i * AGE.size)[0] / 100)
+
+    def ages(self, block_rows=65536):
+        """Yield ages as int, the same values stream_user_ages() produces"""
+        for start in range(0, self.rows, block_rows):
+            end = min(start + block_rows, self.rows)
+            block = self._mm[self._ages_at + start * AGE.size:self._ages_at + end * AGE.size]
+            for (hundredths,) in AGE.iter_unpack(block):
+                yield int(hundredths / 100)
+
+    def _text(self, offset, width):
+        return self._mm[offset:offset + width].rstrip(b"\0").decode("utf-8")
+
+    def users(self, compact=False):
+        """Yield rows as stream_users() does: dicts, or UserRow with compact=True"""
+        nw, ew = self._name_width, self._email_width
+        for i in range(self.rows):
+            row = UserRow(
+                self._text(HEADER_SIZE + i * ID_WIDTH, ID_WIDTH),
+                self._text(self._names_at + i * nw, nw),
+                self._text(self._emails_at + i * ew, ew),
+                self._age(i),
+            )
+            yield row if compact else row._asdict()
+
+
+def _recently_checked(path, fingerprint, recheck_after):
+    with _checked_lock:
+        checked = _checked.get(path)
+    return (
+        checked is not None
+        and checked[0] == fingerprint
+        and time.monotonic() - checked[1] < recheck_after
+    )
+
+
+def _mark_checked(path, fingerprint):
+    with _checked_lock:
+        _checked[path] = (fingerprint, time.monotonic())
+
+
+def open_snapshot(path=DEFAULT_PATH, refresh=True, recheck_after=None):
+    """
+    Map the snapshot at `path`, (re)dumping it first when it is missing or,
+    with refresh=True, when user_data has changed since it was taken.
+    A snapshot that passed the check less than recheck_after seconds ago
+    (default RECHECK_AFTER) is trusted without querying user_data.
+    """
+    if recheck_after is None:
+        recheck_after = RECHECK_AFTER
+    if os.path.exists(path):
+        snap = Snapshot(path)
+        if not refresh or _recently_checked(path, snap.fingerprint, recheck_after):
+            return snap
+        if snap.fingerprint == table_fingerprint():
+            _mark_checked(path, snap.fingerprint)
+            return snap
+        snap.close()
+    dump_snapshot(path)
+    snap = Snapshot(path)
+    _mark_checked(path, snap.fingerprint)
+    return snap
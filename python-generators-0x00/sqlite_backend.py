@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Embedded SQLite stand-in for the MySQL backend.
+
+Selected with USER_DATA_BACKEND=sqlite; the database file comes from
+USER_DATA_SQLITE (default user_data.sqlite3). The schema mirrors the MySQL
+one (user_id primary key, email and (updated_at, user_id) indexes, change
+tracking and content hash), so the generators, loaders and benchmarks run
+unchanged without a MySQL server.
+
+The connection/cursor wrappers implement the slice of the mysql.connector
+API this project uses: `%s` placeholders, cursor(dictionary=..., buffered=...),
+fetchone/fetchmany/fetchall/iteration, commit/rollback/ping/close and in_transaction.
+LOAD DATA LOCAL INFILE has no SQLite equivalent and stays MySQL-only.
+"""
+
+import os
+import sqlite3
+from itertools import islice
+
+from seed import CHANGES_INDEX, TABLE_NAME
+
+DEFAULT_PATH = "user_data.sqlite3"
+# same text form for the column default and for upserts, so values compare
+NOW_SQL = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+DDL = (
+    f"""
+    CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+        user_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL,
+        age NUMERIC NOT NULL,
+        updated_at TEXT NOT NULL DEFAULT ({NOW_SQL}),
+        version INTEGER NOT NULL DEFAULT 1,
+        content_hash BLOB
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_email ON {TABLE_NAME} (email)",
+    f"CREATE INDEX IF NOT EXISTS {CHANGES_INDEX} ON {TABLE_NAME} (updated_at, user_id)",
+)
+
+# DO UPDATE sees the stored row in every assignment, so the comparisons
+# below all read the old values; unchanged rows keep version and updated_at
+_UNCHANGED = (
+    "name IS excluded.name AND email IS excluded.email AND age IS excluded.age"
+)
+UPSERT_SQL = f"""
+    INSERT INTO {TABLE_NAME} (user_id, name, email, age, content_hash)
+    VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (user_id) DO UPDATE SET
+      version = CASE WHEN {_UNCHANGED} THEN version ELSE version + 1 END,
+      updated_at = CASE WHEN {_UNCHANGED} THEN updated_at ELSE {NOW_SQL} END,
+      name = excluded.name,
+      email = excluded.email,
+      age = excluded.age,
+      content_hash = excluded.content_hash
+"""
+
+
+def _placeholders(sql):
+    return sql.replace("%s", "?")
+
+
+class _VarPop:
+    """VAR_POP aggregate, which SQLite lacks (used by 4-stream_ages.sql_stats)"""
+
+    def __init__(self):
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+
+    def step(self, value):
+        if value is None:
+            return
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def finalize(self):
+        return self.m2 / self.n if self.n else None
+
+
+class _BufferedRows:
+    """A whole result read at execute time, as a mysql buffered cursor holds it"""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+
+    def fetchone(self):
+        return next(self._rows, None)
+
+    def fetchmany(self, size=1):
+        return list(islice(self._rows, size))
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def __iter__(self):
+        return self._rows
+
+
+class SQLiteCursor:
+    """
+    mysql.connector-style cursor over a sqlite3 cursor. Results stream from
+    SQLite a step at a time unless buffered=True, which reads them in full
+    at execute(), so buffered and unbuffered scans differ as with MySQL.
+    """
+
+    def __init__(self, cursor, dictionary=False, buffered=False):
+        self._cur = cursor
+        self._rows = cursor
+        self._dictionary = dictionary
+        self._buffered = buffered
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {d[0]: value for d, value in zip(self._cur.description, row)}
+
+    def execute(self, sql, params=()):
+        self._cur.execute(_placeholders(sql), tuple(params or ()))
+        self._rows = _BufferedRows(self._cur.fetchall()) if self._buffered else self._cur
+
+    def executemany(self, sql, seq_params):
+        self._cur.executemany(_placeholders(sql), seq_params)
+
+    def fetchone(self):
+        return self._row(self._rows.fetchone())
+
+    def fetchmany(self, size=1):
+        rows = self._rows.fetchmany(size)
+        return [self._row(r) for r in rows] if self._dictionary else rows
+
+    def fetchall(self):
+        rows = self._rows.fetchall()
+        return [self._row(r) for r in rows] if self._dictionary else rows
+
+    def __iter__(self):
+        if not self._dictionary:
+            return iter(self._rows)
+        return (self._row(r) for r in self._rows)
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def close(self):
+        self._cur.close()
+
+
+class SQLiteConnection:
+    """mysql.connector-style connection over one sqlite3 connection."""
+
+    unread_result = False
+
+    def __init__(self, path):
+        # the pool hands connections between threads, one user at a time
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.create_aggregate("VAR_POP", 1, _VarPop)
+
+    def cursor(self, dictionary=False, buffered=None):
+        return SQLiteCursor(self._conn.cursor(), dictionary, bool(buffered))
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False):
+        self._conn.execute("SELECT 1")
+
+    def close(self):
+        self._conn.close()
+
+
+class SQLiteBackend:
+    """Backend for seed.get_backend() when USER_DATA_BACKEND=sqlite."""
+
+    name = "sqlite"
+    Error = sqlite3.Error
+    table_options = ""
+    begin_snapshot_sql = "BEGIN"
+    upsert_sql = UPSERT_SQL
+    settled_before_sql = (
+        "strftime('%Y-%m-%d %H:%M:%f', 'now', '-' || %s || ' seconds')"
+    )
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("USER_DATA_SQLITE", DEFAULT_PATH)
+
+    def connect(self):
+        return SQLiteConnection(self.path)
+
+    def create_table(self, connection):
+        cur = connection.cursor()
+        try:
+            for statement in DDL:
+                cur.execute(statement)
+            connection.commit()
+        finally:
+            cur.close()
+
+    @staticmethod
+    def byte_length(column):
+        return f"LENGTH(CAST({column} AS BLOB))"
+
+    @staticmethod
+    def as_int(column):
+        return f"CAST({column} AS INTEGER)"
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Constant-memory streaming statistics for the Python Generators project.
+
+- RunningStats: count, mean, variance, min, max (Welford's algorithm)
+- QuantileSketch: approximate percentiles with bounded relative error
+- StreamSummary: both of the above, fed one value at a time
+
+Every class has merge(), so partial results from sharded or parallel scans
+combine into the same answer a single pass would have produced.
+"""
+
+import math
+
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+
+class RunningStats:
+    """Welford running mean/variance; merge() uses Chan's pairwise update."""
+
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        return self
+
+    def merge(self, other):
+        """Fold another RunningStats into this one"""
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self._m2 = other.count, other.mean, other._m2
+            self.min, self.max = other.min, other.max
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @classmethod
+    def from_aggregates(cls, count, mean, variance, minimum, maximum):
+        """Build from SQL COUNT/AVG/VAR_POP/MIN/MAX so it can merge like a scan"""
+        stats = cls()
+        stats.count = int(count or 0)
+        if stats.count:
+            stats.mean = float(mean)
+            stats._m2 = float(variance) * stats.count
+            stats.min = float(minimum)
+            stats.max = float(maximum)
+        return stats
+
+    @property
+    def variance(self):
+        """Population variance (matches SQL VAR_POP)"""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def sample_variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "variance": self.variance,
+            "stddev": self.stddev,
+            "min": self.min,
+            "max": self.max,
+        }
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative-error guarantees (DDSketch-style).
+
+    Values are counted in logarithmic buckets, so any quantile is returned
+    within `relative_accuracy` of the true value. Memory is capped at
+    max_buckets; past that the lowest buckets are collapsed together, which
+    only costs accuracy at the extreme low end.
+    """
+
+    # values closer to zero than this are counted as zero
+    MIN_MAGNITUDE = 1e-9
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._positive = {}
+        self._negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, magnitude):
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, key):
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        if value > self.MIN_MAGNITUDE:
+            key = self._key(value)
+            self._positive[key] = self._positive.get(key, 0) + 1
+        elif value < -self.MIN_MAGNITUDE:
+            key = self._key(-value)
+            self._negative[key] = self._negative.get(key, 0) + 1
+        else:
+            self.zero_count += 1
+        if len(self._positive) + len(self._negative) > self.max_buckets:
+            self._collapse()
+        return self
+
+    def _collapse(self):
+        """Merge the lowest-magnitude buckets until within max_buckets"""
+        while len(self._positive) + len(self._negative) > self.max_buckets:
+            store = (
+                self._positive if len(self._positive) >= len(self._negative)
+                else self._negative
+            )
+            lowest, second = sorted(store)[:2]
+            store[second] += store.pop(lowest)
+
+    def merge(self, other):
+        """Fold another sketch (same relative_accuracy) into this one"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, n in other._positive.items():
+            self._positive[key] = self._positive.get(key, 0) + n
+        for key, n in other._negative.items():
+            self._negative[key] = self._negative.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self._collapse()
+        return self
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1); None when empty"""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        # ascending order: most negative first, then zeros, then positives
+        for key in sorted(self._negative, reverse=True):
+            seen += self._negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self._positive):
+            seen += self._positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self._positive)) if self._positive else 0.0
+
+    def percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        return {f"p{p:g}": self.quantile(p / 100) for p in percentiles}
+
+
+class StreamSummary:
+    """RunningStats plus a QuantileSketch over one stream of numbers."""
+
+    def __init__(self, relative_accuracy=0.01):
+        self.stats = RunningStats()
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, value):
+        self.stats.add(value)
+        self.sketch.add(value)
+        return self
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def as_dict(self, percentiles=DEFAULT_PERCENTILES):
+        summary = self.stats.as_dict()
+        summary.update(self.sketch.percentiles(percentiles))
+        return summary
+
+
+def summarize(values, relative_accuracy=0.01):
+    """Consume any numeric iterable (e.g. stream_user_ages()) into a StreamSummary"""
+    summary = StreamSummary(relative_accuracy)
+    for value in values:
+        summary.add(value)
+    return summary
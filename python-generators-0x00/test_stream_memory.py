@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Memory-profile tests for stream_users, run on the SQLite backend.
+
+The same scan is traced at two row counts 100x apart: an unbuffered stream
+must peak at about the same traced memory for both, while a buffered one
+(the whole result read at execute time) grows with the table.
+"""
+
+import os
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+os.environ["USER_DATA_BACKEND"] = "sqlite"
+
+import seed  # noqa: E402
+from sqlite_backend import SQLiteBackend  # noqa: E402
+
+stream_users_mod = __import__("0-stream_users")
+
+SMALL_ROWS = 1000
+LARGE_ROWS = 100000
+
+
+def _seed_rows(path, rows):
+    backend = SQLiteBackend(path)
+    conn = backend.connect()
+    try:
+        backend.create_table(conn)
+        cur = conn.cursor()
+        cur.executemany(
+            f"INSERT INTO {seed.TABLE_NAME} (user_id, name, email, age) "
+            "VALUES (%s, %s, %s, %s)",
+            (
+                (f"{i:036d}", f"User {i}", f"user{i}@example.com", 18 + i % 60)
+                for i in range(rows)
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return backend
+
+
+def _peak(pool, unbuffered):
+    """Peak traced bytes while streaming (and dropping) every row"""
+    with patch.object(seed, "get_pool", return_value=pool):
+        # open the pooled connection first so its setup is not traced
+        with seed.pooled_connection():
+            pass
+        tracemalloc.start()
+        try:
+            for _ in stream_users_mod.stream_users(unbuffered):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+class TestStreamUsersMemory(unittest.TestCase):
+    """Peak client memory of stream_users against table size."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.pools = {}
+        for rows in (SMALL_ROWS, LARGE_ROWS):
+            backend = _seed_rows(os.path.join(cls._tmp.name, f"{rows}.sqlite3"), rows)
+            cls.pools[rows] = seed.ConnectionPool(max_size=1, connect=backend.connect)
+
+    @classmethod
+    def tearDownClass(cls):
+        for pool in cls.pools.values():
+            pool.close()
+        cls._tmp.cleanup()
+
+    def test_unbuffered_peak_is_flat(self):
+        """Streaming 100x more rows does not raise the unbuffered peak."""
+        small = _peak(self.pools[SMALL_ROWS], unbuffered=True)
+        large = _peak(self.pools[LARGE_ROWS], unbuffered=True)
+        self.assertLess(large, 1.5 * small + 64 * 1024)
+        self.assertLess(large, 2 * 1024 * 1024)
+
+    def test_buffered_peak_grows(self):
+        """The check tells the two apart: a buffered scan holds every row."""
+        unbuffered = _peak(self.pools[LARGE_ROWS], unbuffered=True)
+        buffered = _peak(self.pools[LARGE_ROWS], unbuffered=False)
+        self.assertGreater(buffered, 10 * unbuffered)
+
+
+if __name__ == "__main__":
+    unittest.main()